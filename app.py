@@ -1,12 +1,24 @@
-from flask import Flask, request, jsonify, render_template, send_from_directory, session
+from flask import Flask, Response, request, jsonify, render_template, send_from_directory, session, stream_with_context
 import os
+import re
 import json
 from pathlib import Path
-import io
 import sys
 import uuid
 import secrets
-import shutil
+import threading
+import atexit
+import time
+import hashlib
+import functools
+import contextlib
+import gzip
+import zlib
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
 
 # Import kiro_renderer
 try:
@@ -15,34 +27,271 @@ except ImportError:
     # If in the same directory
     sys.path.append(os.path.dirname(os.path.abspath(__file__)))
     import kiro_renderer
+import kiro_pool
+import kiro_storage
 
 app = Flask(__name__, static_folder='.', static_url_path='')
 app.secret_key = secrets.token_hex(16)  # Required for sessions
 
-# Create storage directory if it doesn't exist
+# Storage directory, created by the files backend on first use
 STORAGE_DIR = Path('kiro_files')
-STORAGE_DIR.mkdir(exist_ok=True)
 
-# Welcome template file path
+# Welcome template file path and the name it is given in each user's files
 WELCOME_TEMPLATE = STORAGE_DIR / 'welcome.kiro'
+WELCOME_FILE = 'welcome.kiro'
 
-def get_user_dir():
-    """Get or create user session directory"""
-    if 'user_id' not in session:
-        session['user_id'] = str(uuid.uuid4())
-    
-    user_dir = STORAGE_DIR / session['user_id']
-    if not user_dir.exists():
-        user_dir.mkdir(parents=True, exist_ok=True)
-        # Create welcome file for new users
-        welcome_file = user_dir / 'welcome.kiro'
-        if WELCOME_TEMPLATE.exists():
-            # Read from template with utf-8 encoding and write to user file
-            welcome_content = WELCOME_TEMPLATE.read_text(encoding='utf-8')
-            welcome_file.write_text(welcome_content, encoding='utf-8')
+# Maximum number of editor documents held server-side for delta renders
+MAX_RENDER_DOCUMENTS = 512
+
+# Seconds between keep-alive comments on an idle preview stream
+PREVIEW_KEEPALIVE = 15
+
+# Seconds after which a preview stream ends so the browser reconnects; each
+# open stream holds a server thread, so streams must not live forever
+PREVIEW_MAX_DURATION = float(os.environ.get('KIRO_PREVIEW_MAX_DURATION', '300'))
+
+# Maximum number of preview streams open at once, by default a quarter of
+# gunicorn's KIRO_THREADS so saves and renders always find a free thread;
+# past it the stream is refused and the editor renders through
+# /api/render/delta instead
+PREVIEW_MAX_STREAMS = int(os.environ.get(
+    'KIRO_PREVIEW_MAX_STREAMS', str(max(1, int(os.environ.get('KIRO_THREADS', '64')) // 4))))
+
+# Render budgets: wall-clock seconds per render, maximum input size in
+# characters and number of warm worker processes (0 = one per CPU)
+RENDER_TIMEOUT = float(os.environ.get('KIRO_RENDER_TIMEOUT', '5'))
+RENDER_MAX_CHARS = int(os.environ.get('KIRO_RENDER_MAX_CHARS', '2000000'))
+RENDER_WORKERS = int(os.environ.get('KIRO_RENDER_WORKERS', '0'))
+
+# Capacity of the rendered output cache in bytes
+RENDER_CACHE_BYTES = int(os.environ.get('KIRO_RENDER_CACHE_BYTES', str(32 * 1024 * 1024)))
+
+# Document storage: 'files' keeps a directory per user under STORAGE_DIR,
+# 'sqlite' keeps every user in the STORAGE_DB database (WAL mode). Import
+# existing directories with: python kiro_storage.py kiro_files kiro.db
+STORAGE_BACKEND = os.environ.get('KIRO_STORAGE', 'files')
+STORAGE_DB = os.environ.get('KIRO_STORAGE_DB', 'kiro.db')
+
+# Write-behind buffering of saves with the 'files' backend: a file is
+# written once it has been idle for WRITE_BEHIND_IDLE seconds or dirty for
+# WRITE_BEHIND_INTERVAL seconds, and on shutdown. An interval of 0 writes
+# every save straight to disk. Buffered saves are only visible to this
+# process, so with buffering on a second process serving STORAGE_DIR refuses
+# to start.
+WRITE_BEHIND_INTERVAL = float(os.environ.get('KIRO_WRITE_BEHIND', '0'))
+WRITE_BEHIND_IDLE = float(os.environ.get('KIRO_WRITE_BEHIND_IDLE', '1'))
+
+# Paged folder listings: default and maximum page size, maximum depth
+LISTING_PAGE_SIZE = 200
+MAX_LISTING_PAGE_SIZE = 1000
+MAX_LISTING_DEPTH = 8
+
+# Responses smaller than this are sent uncompressed
+COMPRESS_MIN_SIZE = 1024
+COMPRESS_MIMETYPES = {'application/json', 'text/html'}
+
+# Characters outside the BMP take two UTF-16 code units in the browser
+ASTRAL_CHAR_RE = re.compile('[\U00010000-\U0010FFFF]')
+
+class RenderDocument:
+    """Server-held copy of an editor tab's document for delta renders"""
+
+    def __init__(self, content):
+        self.version = 1
+        self.content = content
+        self.sent_blocks = set()
+        self.lock = threading.Lock()
+        # Preview stream state: notified on every edit and on stream takeover
+        self.changed = threading.Condition(self.lock)
+        self.stream_id = 0
+
+# (user_id, tab) -> RenderDocument
+render_documents = kiro_renderer.LRUCache(MAX_RENDER_DOCUMENTS)
+render_documents_lock = threading.Lock()
+
+def get_render_document(key):
+    """Get the server-held document for a tab, creating an empty one if missing"""
+    with render_documents_lock:
+        document = render_documents.get(key)
+        if document is None:
+            document = RenderDocument('')
+            render_documents.put(key, document)
+        return document
+
+def render_result_size(result):
+    """Approximate memory held by a cached (html_body, global_class_str) pair"""
+    html_body, global_class_str = result
+    return len(html_body.encode('utf-8')) + len(global_class_str.encode('utf-8'))
+
+# Content hash -> (html_body, global_class_str)
+render_cache = kiro_renderer.LRUCache(RENDER_CACHE_BYTES, weigh=render_result_size)
+
+# Part of every render ETag, so a renderer change invalidates them
+RENDERER_FINGERPRINT = kiro_renderer.renderer_hash()[:12]
+
+def create_storage():
+    """Create the document storage backend selected by STORAGE_BACKEND"""
+    if STORAGE_BACKEND == 'sqlite':
+        return kiro_storage.SQLiteStorage(Path(STORAGE_DB))
+    write_buffer = None
+    if WRITE_BEHIND_INTERVAL > 0:
+        write_buffer = kiro_storage.WriteBehindBuffer(WRITE_BEHIND_INTERVAL, WRITE_BEHIND_IDLE)
+    return kiro_storage.FileStorage(STORAGE_DIR, write_buffer)
+
+# Storage backend, created on the first request: importing this module (as
+# the reloader parent or a spawned render worker does) must not take the
+# write-behind lock or start the flush thread
+storage = None
+storage_lock = threading.Lock()
+
+def get_storage():
+    """Get the document storage backend, creating it on first use"""
+    global storage
+    with storage_lock:
+        if storage is None:
+            storage = create_storage()
+            atexit.register(storage.close)
+    return storage
+
+# Striped locks serialising read-patch-write saves of the same file
+SAVE_LOCKS = [threading.Lock() for _ in range(64)]
+
+def save_lock(user_id, path):
+    """Lock guarding saves of one user's file"""
+    return SAVE_LOCKS[hash((user_id, path)) % len(SAVE_LOCKS)]
+
+@contextlib.contextmanager
+def save_locks(user_id, *paths):
+    """Hold the save locks of several of one user's files, taken in a fixed
+    order so two renames can't deadlock"""
+    stripes = sorted({hash((user_id, path)) % len(SAVE_LOCKS) for path in paths})
+    with contextlib.ExitStack() as stack:
+        for stripe in stripes:
+            stack.enter_context(SAVE_LOCKS[stripe])
+        yield
+
+# Held by each open preview stream
+preview_slots = threading.BoundedSemaphore(PREVIEW_MAX_STREAMS)
+
+# Worker pool, started on the first render request
+render_pool = None
+render_pool_lock = threading.Lock()
+
+def get_render_pool():
+    """Get the render worker pool, starting it on first use"""
+    global render_pool
+    with render_pool_lock:
+        if render_pool is None:
+            render_pool = kiro_pool.RenderPool(RENDER_WORKERS or None, RENDER_TIMEOUT, RENDER_MAX_CHARS)
+            atexit.register(render_pool.close)
+    return render_pool
+
+def content_key(content):
+    """Hash identifying a document's content in the render cache"""
+    return hashlib.blake2b(content.encode('utf-8'), digest_size=16).hexdigest()
+
+def render_etag(content):
+    """ETag of the render of content: known before rendering, so a match skips it"""
+    return f'{RENDERER_FINGERPRINT}-{content_key(content)}'
+
+def not_modified(etag):
+    """Build an empty 304 response carrying etag"""
+    response = app.response_class(status=304)
+    response.set_etag(etag, weak=True)
+    return response
+
+def cached_render(content):
+    """Render content through the output cache, falling back to the worker pool"""
+    key = content_key(content)
+    result = render_cache.get(key)
+    if result is None:
+        result = get_render_pool().render(content)
+        render_cache.put(key, result)
+    return result
+
+def stream_body(chunks, key, global_class_str):
+    """Pass through body chunks streamed from the worker pool, storing the
+    completed render in the output cache
+
+    The response has already started, so a render that fails or times out
+    midway is logged and the document is closed early. A body larger than
+    the whole cache is not kept while it streams.
+    """
+    body = []
+    size = 0
+    try:
+        for chunk in chunks:
+            if body is not None:
+                body.append(chunk)
+                size += len(chunk)
+                if size > RENDER_CACHE_BYTES:
+                    body = None
+            yield chunk
+    except kiro_pool.RenderError as e:
+        app.logger.warning('Streamed render stopped: %s', e)
+        return
+    if body is not None:
+        render_cache.put(key, (''.join(body), global_class_str))
+
+def negotiate_encoding():
+    """Pick the best content coding the client accepts: brotli if available, else gzip"""
+    codings = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(codings)
+
+def compress_chunks(chunks, encoding):
+    """Compress a streamed response, flushing after every chunk so it still streams"""
+    if encoding == 'br':
+        compressor = brotli.Compressor()
+        for chunk in chunks:
+            data = compressor.process(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+            yield data + compressor.flush()
+        yield compressor.finish()
+    else:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        for chunk in chunks:
+            data = compressor.compress(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+            yield data + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+
+@app.after_request
+def compress_response(response):
+    """Compress JSON and HTML responses for clients that accept gzip or brotli"""
+    if (response.mimetype not in COMPRESS_MIMETYPES or response.direct_passthrough
+            or response.status_code in (204, 304) or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    if response.is_streamed:
+        response.response = compress_chunks(response.response, encoding)
+    else:
+        data = response.get_data()
+        if len(data) < COMPRESS_MIN_SIZE:
+            return response
+        if encoding == 'br':
+            response.set_data(brotli.compress(data))
         else:
-            # Fallback content if template doesn't exist
-            welcome_content = """# 환영합니다!
+            response.set_data(gzip.compress(data, 6))
+    response.headers['Content-Encoding'] = encoding
+
+    # The compressed body is a different representation of the same content
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+@functools.lru_cache(maxsize=None)
+def welcome_content():
+    """Read the welcome template shared by every session that has not written
+    yet; it is served read-only until the session's first write copies it
+    into storage"""
+    if WELCOME_TEMPLATE.exists():
+        # Read from template with utf-8 encoding
+        return WELCOME_TEMPLATE.read_text(encoding='utf-8')
+    # Fallback content if template doesn't exist
+    return """# 환영합니다!
 
 안녕하세요! KIRO 편집기에 오신 것을 환영합니다.
 
@@ -52,88 +301,203 @@ def get_user_dir():
 - 파일 관리
 
 새로운 문서를 작성하거나 이 문서를 수정해보세요."""
-            welcome_file.write_text(welcome_content, encoding='utf-8')
-    
-    return user_dir
+
+@app.before_first_request
+def warm_render_cache():
+    """Pre-render the welcome template that every new session opens"""
+    content = welcome_content()
+    render_cache.put(content_key(content), kiro_renderer.render_kiro(content))
+
+def render_error_response(error):
+    """Map a render pool failure to a JSON error response"""
+    if isinstance(error, kiro_pool.DocumentTooLarge):
+        return jsonify({'error': 'Document too large to render', 'limit': RENDER_MAX_CHARS}), 413
+    if isinstance(error, kiro_pool.RenderTimeout):
+        return jsonify({'error': 'Render timed out', 'timeout': RENDER_TIMEOUT}), 503
+    return jsonify({'error': str(error)}), 500
+
+def get_user_id():
+    """Get the session's user id without touching storage"""
+    if 'user_id' not in session:
+        session['user_id'] = str(uuid.uuid4())
+    return session['user_id']
+
+def provision_user(user_id):
+    """Create the user's storage on their first write, copying in the welcome file"""
+    if get_storage().ensure_user(user_id):
+        get_storage().write(user_id, WELCOME_FILE, welcome_content())
+
+def provision_for_change(user_id, path):
+    """Provision before deleting or moving path; of the template, only the welcome file exists"""
+    if not get_storage().has_user(user_id) and path != WELCOME_FILE:
+        raise FileNotFoundError(path)
+    provision_user(user_id)
+
+def template_listing():
+    """The file tree of a session that has not written yet"""
+    return [{'id': WELCOME_FILE, 'name': WELCOME_FILE, 'type': 'file'}]
+
+def template_page(folder_path, cursor):
+    """One root page of the template tree; other folders do not exist"""
+    if folder_path:
+        return None
+    children = [] if cursor else template_listing()
+    return {'id': '', 'child_count': 1, 'children': children, 'next_cursor': None}
+
+def read_document(user_id, path):
+    """Read a document, falling back to the shared welcome template"""
+    if get_storage().has_user(user_id):
+        return get_storage().read(user_id, path)
+    if path == WELCOME_FILE:
+        return welcome_content()
+    raise FileNotFoundError(path)
+
+def storage_error_response(error):
+    """Map a storage failure to a JSON error response"""
+    if isinstance(error, ValueError):
+        return jsonify({'error': str(error)}), 400
+    if isinstance(error, FileNotFoundError):
+        return jsonify({'error': 'Not found'}), 404
+    if isinstance(error, (FileExistsError, NotADirectoryError, IsADirectoryError)):
+        return jsonify({'error': 'Already exists'}), 409
+    return jsonify({'error': str(error)}), 500
+
+def utf16_to_index(text, offset):
+    """Convert a UTF-16 code unit offset (as used by JavaScript) to a str index"""
+    astral_before = 0
+    for match in ASTRAL_CHAR_RE.finditer(text, 0, offset):
+        if match.start() + astral_before >= offset:
+            break
+        astral_before += 1
+    return offset - astral_before
+
+def validate_edit(edit):
+    """Return (offset, delete, insert) of one edit, or raise ValueError if malformed"""
+    if not isinstance(edit, dict):
+        raise ValueError('Edit must be an object')
+    offset, delete, insert = edit.get('offset', 0), edit.get('delete', 0), edit.get('insert', '')
+    # bool is an int subclass, but true/false are not offsets
+    if any(isinstance(n, bool) or not isinstance(n, int) for n in (offset, delete)) or not isinstance(insert, str):
+        raise ValueError('Edit needs int offset/delete and str insert')
+    return offset, delete, insert
+
+def apply_edits(content, edits):
+    """Apply a list of {offset, delete, insert} edits in order
+
+    Raises ValueError for a malformed or out-of-range edit.
+    """
+    if not isinstance(edits, list):
+        raise ValueError('Edits must be a list')
+    for edit in edits:
+        offset, delete, insert = validate_edit(edit)
+        start = utf16_to_index(content, offset)
+        end = utf16_to_index(content, offset + delete)
+        if offset < 0 or delete < 0 or end > len(content):
+            raise ValueError('Edit out of range')
+        content = content[:start] + insert + content[end:]
+    return content
 
 @app.route('/')
 def index():
-    # Ensure user directory exists and welcome file is created
-    get_user_dir()
+    # Issue the session id before the page opens its preview stream and file
+    # requests in parallel; storage is created on the first write, not here
+    get_user_id()
     return send_from_directory('.', 'index.html')
 
 @app.route('/api/files')
 def list_files():
-    """Get the file structure for the current user"""
-    result = []
-    
-    def traverse_dir(path, parent_id=None):
-        items = []
-        for item in path.iterdir():
-            item_type = 'folder' if item.is_dir() else 'file'
-            item_id = f"{parent_id}/{item.name}" if parent_id else item.name
-            
-            if item_type == 'folder':
-                children = traverse_dir(item, item_id)
-                items.append({
-                    'id': item_id,
-                    'name': item.name,
-                    'type': item_type,
-                    'children': children
-                })
-            else:
-                if item.suffix == '.kiro':
-                    items.append({
-                        'id': item_id,
-                        'name': item.name,
-                        'type': item_type
-                    })
-        
-        return sorted(items, key=lambda x: (x['type'] != 'folder', x['name']))
-    
+    """Get the file structure for the current user
+
+    Without parameters the whole tree is returned. With any of path, depth,
+    cursor or limit, one page of a single folder is returned instead:
+    {id, child_count, children, next_cursor}, where folders carry
+    child_count and, below depth, their own first page of children.
+    """
+    lazy = any(name in request.args for name in ('path', 'depth', 'cursor', 'limit'))
     try:
-        user_dir = get_user_dir()
-        result = traverse_dir(user_dir)
+        user_id = get_user_id()
+        provisioned = get_storage().has_user(user_id)
+        if not lazy:
+            return jsonify(get_storage().listing(user_id) if provisioned else template_listing())
+        folder_path = request.args.get('path', '')
+        if folder_path:
+            folder_path = kiro_storage.normalize_path(folder_path)
+        depth = min(max(int(request.args.get('depth', 1)), 1), MAX_LISTING_DEPTH)
+        limit = min(max(int(request.args.get('limit', LISTING_PAGE_SIZE)), 1), MAX_LISTING_PAGE_SIZE)
+        cursor = request.args.get('cursor') or None
+        if provisioned:
+            result = get_storage().page(user_id, folder_path, depth, cursor, limit)
+        else:
+            result = template_page(folder_path, cursor)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return storage_error_response(e)
     
+    if result is None:
+        return jsonify({'error': 'Folder not found'}), 404
     return jsonify(result)
 
 @app.route('/api/file', methods=['GET'])
 def get_file():
-    """Get file content"""
+    """Get file content and its version (a content hash, also sent as the ETag)"""
     file_path = request.args.get('path')
     if not file_path:
         return jsonify({'error': 'No file path provided'}), 400
     
     try:
-        user_dir = get_user_dir()
-        full_path = user_dir / file_path
-        content = full_path.read_text(encoding='utf-8')
-        return jsonify({'content': content})
+        user_id = get_user_id()
+        content = read_document(user_id, kiro_storage.normalize_path(file_path))
+        response = jsonify({'content': content, 'version': content_key(content)})
+        response.set_etag(content_key(content), weak=True)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response.make_conditional(request)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return storage_error_response(e)
 
 @app.route('/api/file', methods=['POST'])
 def save_file():
-    """Save file content"""
+    """Save file content
+
+    Send {path, content} to write the whole file, or {path, base_version,
+    edits} with edits as [{offset, delete, insert}] in UTF-16 code units to
+    patch it. base_version is the version from the last read or save; if the
+    file has changed since, 409 is returned and the client should send the
+    full content. Either way the file is replaced atomically.
+    """
     data = request.json
     file_path = data.get('path')
-    content = data.get('content', '')
     
     if not file_path:
         return jsonify({'error': 'No file path provided'}), 400
     
     try:
-        user_dir = get_user_dir()
-        full_path = user_dir / file_path
-        full_path.parent.mkdir(parents=True, exist_ok=True)
-        full_path.write_text(content, encoding='utf-8')
-        return jsonify({'success': True})
+        user_id = get_user_id()
+        file_path = kiro_storage.normalize_path(file_path)
+        with save_lock(user_id, file_path):
+            if 'edits' in data:
+                try:
+                    current = read_document(user_id, file_path)
+                except FileNotFoundError:
+                    return jsonify({'error': 'Version mismatch', 'version': None}), 409
+                version = content_key(current)
+                if version != data.get('base_version'):
+                    return jsonify({'error': 'Version mismatch', 'version': version}), 409
+                try:
+                    content = apply_edits(current, data['edits'])
+                except (TypeError, ValueError):
+                    return jsonify({'error': 'Invalid edit', 'version': version}), 409
+            else:
+                content = data.get('content', '')
+            if file_path == WELCOME_FILE and content == welcome_content() and not get_storage().has_user(user_id):
+                # Saving the untouched template is not a change worth provisioning for
+                return jsonify({'success': True, 'version': content_key(content)})
+            provision_user(user_id)
+            get_storage().write(user_id, file_path, content)
+        return jsonify({'success': True, 'version': content_key(content)})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return storage_error_response(e)
 
 @app.route('/api/file', methods=['DELETE'])
+@app.route('/api/folder', methods=['DELETE'])
 def delete_file():
     """Delete a file or folder"""
     file_path = request.args.get('path')
@@ -141,16 +505,15 @@ def delete_file():
         return jsonify({'error': 'No file path provided'}), 400
     
     try:
-        user_dir = get_user_dir()
-        full_path = user_dir / file_path
-        if full_path.is_dir():
-            import shutil
-            shutil.rmtree(full_path)
-        else:
-            full_path.unlink()
+        user_id = get_user_id()
+        file_path = kiro_storage.normalize_path(file_path)
+        provision_for_change(user_id, file_path)
+        # A save in flight would otherwise write the file back after it is gone
+        with save_lock(user_id, file_path):
+            get_storage().delete(user_id, file_path)
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return storage_error_response(e)
 
 @app.route('/api/folder', methods=['POST'])
 def create_folder():
@@ -162,115 +525,299 @@ def create_folder():
         return jsonify({'error': 'No folder path provided'}), 400
     
     try:
-        user_dir = get_user_dir()
-        full_path = user_dir / folder_path
-        full_path.mkdir(parents=True, exist_ok=True)
+        user_id = get_user_id()
+        folder_path = kiro_storage.normalize_path(folder_path)
+        provision_user(user_id)
+        get_storage().create_folder(user_id, folder_path)
         return jsonify({'success': True})
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return storage_error_response(e)
+
+@app.route('/api/file/rename', methods=['POST'])
+@app.route('/api/folder/rename', methods=['POST'])
+def rename_item():
+    """Rename or move a file or folder: {old_path, new_path}"""
+    data = request.json
+    old_path = data.get('old_path')
+    new_path = data.get('new_path')
+    
+    if not old_path or not new_path:
+        return jsonify({'error': 'No path provided'}), 400
+    
+    try:
+        user_id = get_user_id()
+        old_path = kiro_storage.normalize_path(old_path)
+        new_path = kiro_storage.normalize_path(new_path)
+        provision_for_change(user_id, old_path)
+        # A save in flight would otherwise write to the old path after the move
+        with save_locks(user_id, old_path, new_path):
+            get_storage().move(user_id, old_path, new_path)
+        return jsonify({'success': True})
+    except Exception as e:
+        return storage_error_response(e)
+
+@app.route('/api/shell')
+def document_shell():
+    """Serve the shared document shell that wraps every rendered body"""
+    response = app.response_class(kiro_renderer.DOCUMENT_SHELL, mimetype='text/html')
+    response.set_etag(kiro_renderer.DOCUMENT_SHELL_ETAG)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def sum_cache_info(infos):
+    """Add up cache_info() results from several processes, cache by cache"""
+    total = {}
+    for info in infos:
+        for cache, counters in info.items():
+            summed = total.setdefault(cache, dict.fromkeys(counters, 0))
+            for name, value in counters.items():
+                summed[name] += value
+    return total
+
+@app.route('/api/render/stats')
+def render_stats():
+    """Report hit/miss/eviction counters of the render caches
+
+    'output' is the rendered output cache in the web process. 'workers' sums
+    the block and style caches of the render workers that answered within
+    RENDER_TIMEOUT and 'per_worker' lists them one by one; the pool is not
+    started just to answer. 'web' is the web process's own block and style
+    caches, which only the welcome pre-render uses.
+    """
+    try:
+        per_worker = render_pool.stats() if render_pool is not None else []
+    except Exception as e:
+        return render_error_response(e)
+    return jsonify({
+        'output': render_cache.info(),
+        'workers': sum_cache_info(per_worker),
+        'per_worker': per_worker,
+        'web': kiro_renderer.cache_info(),
+    })
+
+@app.route('/api/storage/stats')
+def storage_stats():
+    """Report the storage backend's counters (write-behind saves and flushes, or
+    database users, documents and bytes)"""
+    return jsonify(get_storage().stats())
 
 @app.route('/api/render', methods=['POST'])
 def render_kiro():
-    """Render Kiro content to full HTML for iframe"""
+    """Render Kiro content to an article body and its global classes
+
+    The client places both into the document shell from /api/shell.
+    Rendering runs in the worker pool under RENDER_TIMEOUT and
+    RENDER_MAX_CHARS. With ?stream=1 the complete HTML document is streamed
+    as chunked text/html instead, one rendered block at a time, from a pool
+    worker under the same limits.
+    Responses carry an ETag derived from the content; sending it back in
+    If-None-Match returns 304 without rendering.
+    """
     data = request.json
     content = data.get('content', '')
 
+    # POST is never revalidated by the browser: the client sends If-None-Match itself
+    etag = render_etag(content)
+    if request.if_none_match.contains_weak(etag):
+        return not_modified(etag)
+
+    if request.args.get('stream'):
+        key = content_key(content)
+        cached = render_cache.get(key)
+        if cached is not None:
+            response = Response(kiro_renderer.build_document(*cached), mimetype='text/html')
+        else:
+            chunks = get_render_pool().render_stream(content)
+            try:
+                # Limit and wait failures surface here, before the status line is sent
+                global_class_str = next(chunks)
+            except Exception as e:
+                return render_error_response(e)
+            body = stream_body(chunks, key, global_class_str)
+            document = kiro_renderer.iter_document(global_class_str, body)
+            response = Response(stream_with_context(document), mimetype='text/html')
+        response.set_etag(etag, weak=True)
+        return response
+
     if not content:
-        return jsonify({'html': ''})
+        return jsonify({'body': '', 'global_class': ''})
+
+    try:
+        html_body, global_class_str = cached_render(content)
+    except Exception as e:
+        return render_error_response(e)
+    response = jsonify({'body': html_body, 'global_class': global_class_str})
+    response.set_etag(etag, weak=True)
+    return response
+
+@app.route('/api/render/delta', methods=['POST'])
+def render_kiro_delta():
+    """Apply edits to the server-held document and return only changed blocks
+
+    Send {tab, content} to (re)sync, then {tab, version, edits} with edits as
+    [{offset, delete, insert}] in UTF-16 code units. A version mismatch returns
+    409 and the client should resync with the full content.
+    """
+    data = request.json
+    tab = data.get('tab', '')
+    key = (get_user_id(), tab)
+
+    resync = 'content' in data
+    if resync:
+        document = RenderDocument(data['content'])
+        render_documents.put(key, document)
+    else:
+        document = render_documents.get(key)
+        if document is None:
+            return jsonify({'error': 'Version mismatch', 'version': 0}), 409
 
     try:
-        old_stdout = sys.stdout
-        sys.stdout = io.StringIO()
-        html_body, global_class_str = kiro_renderer.render_kiro(content)
-        sys.stdout = old_stdout
-
-        font_styles = kiro_renderer.generate_font_styles()
-
-        full_html = f"""
-        <!DOCTYPE html>
-        <html lang="ko">
-        <head>
-            <meta charset="UTF-8">
-            <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>Kiro Rendered Document</title>
-            <script src="https://cdn.tailwindcss.com?plugins=typography"></script>
-            {font_styles["google_fonts"]}
-            {font_styles["custom_fonts_links"]}
-            {font_styles["custom_fonts"]}
-            {font_styles["tailwind_config"]}
-            <style type="text/css">
-                /* 커스텀 리스트 스타일 */
-                .prose :where(ul.custom-list):not(:where([class~="not-prose"] *)) {{
-                    list-style-type: none;
-                    padding-left: 0em;
-                }}
-
-                /* 헤딩 마진 조정 */
-                .prose :where(h1, h2, h3, h4, h5, h6):not(:where([class~="not-prose"] *)) {{
-                    margin-bottom: 0.3em;
-                }}
-
-                .prose :where(ul.custom-list li):not(:where([class~="not-prose"] *)) {{
-                    display: flex;
-                    align-items: baseline;
-                    margin-top: 0.5em;
-                    margin-bottom: 0.5em;
-                }}
-                .prose :where(ul.custom-list li span):not(:where([class~="not-prose"] *)) {{
-                    font-family: 'JetBrains Mono', monospace;
-                    color: #6b7280;
-                    margin-right: 0.5em;
-                    min-width: 3em;
-                    display: inline-block;
-                    text-align: right;
-                }}
-
-                /* 토글 스타일 개선 */
-                details {{
-                    position: relative;
-                    margin: 0em 0;
-                    padding-left: 1em;
-                }}
-
-                details::before {{
-                    content: none;
-                }}
-
-                details > div {{
-                    position: relative;
-                    margin-left: 1em;
-                    padding-left: 1em;
-                }}
-
-                details > div::before {{
-                    content: '';
-                    position: absolute;
-                    left: -1em;
-                    top: 0;
-                    bottom: 0;
-                    width: 2px;
-                    background-color: #e5e7eb;
-                    border-radius: 1px;
-                }}
-
-                details summary {{
-                    margin-bottom: 0.5em;
-                }}
-            </style>
-        </head>
-        <body class="min-h-screen bg-gray-50 text-gray-800 font-sans">
-            <div class="max-w-3xl mx-auto py-10 px-4 sm:px-6">
-                <article class="prose prose-slate max-w-none {global_class_str}">
-                    {html_body}
-                </article>
-            </div>
-        </body>
-        </html>
-        """
-
-        return jsonify({'html': full_html.strip()})
+        with document.lock:
+            if not resync:
+                if document.version != data.get('version'):
+                    return jsonify({'error': 'Version mismatch', 'version': document.version}), 409
+                edits = data.get('edits', [])
+                if edits:
+                    try:
+                        document.content = apply_edits(document.content, edits)
+                    except (TypeError, ValueError):
+                        return jsonify({'error': 'Invalid edit', 'version': document.version}), 409
+                    document.version += 1
+
+            # Blocks the client already has come back without their HTML
+            blocks, global_class_str = get_render_pool().render_blocks(
+                document.content, document.sent_blocks, affinity=key)
+
+            block_ids = [block_id for block_id, _ in blocks]
+            changed = {block_id: block_html for block_id, block_html in blocks
+                       if block_html is not None}
+            document.sent_blocks = set(block_ids)
+
+            return jsonify({
+                'version': document.version,
+                'blocks': block_ids,
+                'html': changed,
+                'global_class': global_class_str
+            })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return render_error_response(e)
+
+def server_event(event, data):
+    """Format one server-sent event with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def preview_events(key, document, stream_id):
+    """Render the tab's latest content whenever it changes, one render at a time
+
+    Edits that arrive while a render is running are coalesced into the next
+    render. The stream ends when another stream takes over the tab, the
+    document is dropped from render_documents or PREVIEW_MAX_DURATION has
+    passed; EventSource then reconnects and starts over with a full render.
+    """
+    deadline = time.monotonic() + PREVIEW_MAX_DURATION
+    rendered_version = None
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        with document.changed:
+            document.changed.wait_for(
+                lambda: document.version != rendered_version or document.stream_id != stream_id,
+                min(PREVIEW_KEEPALIVE, remaining))
+            if document.stream_id != stream_id:
+                return
+            version, content = document.version, document.content
+
+        if version == rendered_version:
+            if render_documents.get(key) is not document:
+                return
+            yield ': keepalive\n\n'
+            continue
+
+        rendered_version = version
+        with document.lock:
+            known = set(document.sent_blocks)
+        try:
+            # Blocks the client already has come back without their HTML
+            blocks, global_class_str = get_render_pool().render_blocks(content, known, affinity=key)
+        except Exception as e:
+            yield server_event('render-error', {'version': version, 'error': str(e)})
+            continue
+
+        block_ids = [block_id for block_id, _ in blocks]
+        with document.lock:
+            if any(block_html is None and block_id not in document.sent_blocks
+                   for block_id, block_html in blocks):
+                # A new stream reset the sent blocks mid-render: render again in full
+                rendered_version = None
+                continue
+            changed = {block_id: block_html for block_id, block_html in blocks
+                       if block_html is not None and block_id not in document.sent_blocks}
+            document.sent_blocks = set(block_ids)
+        yield server_event('render', {
+            'version': version,
+            'blocks': block_ids,
+            'html': changed,
+            'global_class': global_class_str
+        })
+
+@app.route('/api/preview/stream')
+def preview_stream():
+    """Server-sent events carrying rendered blocks for one editor tab
+
+    Each 'render' event has the same fields as a /api/render/delta response.
+    Edits are pushed with POST /api/preview/edit. With PREVIEW_MAX_STREAMS
+    streams already open, 503 is returned and the client should fall back
+    to /api/render/delta.
+    """
+    if not preview_slots.acquire(blocking=False):
+        response = jsonify({'error': 'Too many preview streams', 'limit': PREVIEW_MAX_STREAMS})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(int(PREVIEW_MAX_DURATION))
+        return response
+
+    key = (get_user_id(), request.args.get('tab', ''))
+    document = get_render_document(key)
+    with document.changed:
+        document.stream_id += 1
+        document.sent_blocks = set()
+        document.changed.notify_all()
+        stream_id = document.stream_id
+
+    response = Response(preview_events(key, document, stream_id), mimetype='text/event-stream')
+    # Runs when the server closes the response, even if it never started streaming
+    response.call_on_close(preview_slots.release)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/preview/edit', methods=['POST'])
+def preview_edit():
+    """Apply edits to a preview stream's document and return its new version
+
+    Takes the same {tab, content} and {tab, version, edits} payloads as
+    /api/render/delta, including the 409 on a version mismatch. The render
+    itself arrives over /api/preview/stream.
+    """
+    data = request.json
+    document = get_render_document((get_user_id(), data.get('tab', '')))
+
+    with document.changed:
+        if 'content' in data:
+            document.content = data['content']
+        else:
+            if document.version != data.get('version'):
+                return jsonify({'error': 'Version mismatch', 'version': document.version}), 409
+            edits = data.get('edits', [])
+            if not edits:
+                return jsonify({'version': document.version})
+            try:
+                document.content = apply_edits(document.content, edits)
+            except (TypeError, ValueError):
+                return jsonify({'error': 'Invalid edit', 'version': document.version}), 409
+        document.version += 1
+        document.changed.notify_all()
+        return jsonify({'version': document.version})
 
 if __name__ == '__main__':
     app.run(debug=True, port=5000) 
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""Kiro 렌더러 벤치마크
+
+기존 render_kiro의 줄 단위 정규식 판별(이전)과 tokenize 렉서(이후)의
+초당 처리 줄 수를 비교하고, 빈 블록 캐시에서 문서 전체를 렌더링하는 속도를 측정합니다.
+마지막으로 write_html의 최대 메모리 사용량이 파일 크기와 관계없이 일정한 한도 안에
+머무는지 tracemalloc으로 확인합니다.
+
+사용법: python bench_renderer.py [줄 수] [반복 횟수]
+"""
+from pathlib import Path
+import os
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import kiro_renderer
+from kiro_renderer import MediaType, Token, TokenType
+
+SAMPLE_FILES = [
+    Path(__file__).parent / "kiro_files" / "welcome.kiro",
+    Path(__file__).parent / "docs" / "kiro.md",
+]
+
+# write_html의 최대 메모리 사용량 한도(바이트)와, 한도와 비교할 입력 파일 크기의 배수
+STREAM_MEMORY_BOUND = 512 * 1024
+STREAM_FILE_MULTIPLES = (1, 4)
+
+def load_sample() -> list:
+    """샘플 파일들의 줄을 이어 붙여 반환합니다."""
+    sample = []
+    for path in SAMPLE_FILES:
+        sample.extend(path.read_text(encoding="utf-8").split("\n"))
+    return sample
+
+def build_document(line_count: int) -> list:
+    """샘플 문서를 이어 붙여 지정한 줄 수의 문서를 만듭니다."""
+    sample = load_sample()
+    lines = []
+    while len(lines) < line_count:
+        lines.extend(sample)
+    return lines[:line_count]
+
+def legacy_classify(lines: list) -> list:
+    """기존 render_kiro와 같은 순서의 개별 정규식 검사로 각 줄을 같은 토큰으로 분류합니다."""
+    tokens = []
+    style_mode = False
+    in_code_block = False
+    for i, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped == "<style>":
+            style_mode = True
+            tokens.append(Token(TokenType.STYLE_START, line))
+            continue
+        elif stripped == "<>":
+            style_mode = False
+            tokens.append(Token(TokenType.STYLE_END, line))
+            continue
+        elif style_mode or (stripped.startswith("[") and "=" in stripped and "]" in stripped):
+            tokens.append(Token(TokenType.STYLE, line))
+            continue
+        if stripped.startswith("```"):
+            in_code_block = not in_code_block
+            tokens.append(Token(TokenType.CODE_FENCE, line, int(in_code_block)))
+            continue
+        if in_code_block:
+            tokens.append(Token(TokenType.CODE, line))
+            continue
+
+        if re.match(r"(#{1,6})?\s*(>{1,})\s*(.+)", line):
+            match = re.match(r"(#{1,6})?\s*(>{1,})\s*(.+)", line)
+            heading, toggle_markers, content = match.groups()
+            if i + 1 < len(lines) and re.match(r"(#{1,6})?\s*(>{1,})\s*(.+)", lines[i + 1]):
+                next_match = re.match(r"(#{1,6})?\s*(>{1,})\s*(.+)", lines[i + 1])
+                len(next_match.group(2)) > len(toggle_markers)
+            tokens.append(Token(TokenType.TOGGLE, line, len(toggle_markers), content, heading or ""))
+            continue
+        if line.startswith("| "):
+            tokens.append(Token(TokenType.QUOTE, line, 0, line[2:]))
+            continue
+        if "[" in line and "]" in line and "<>" in line:
+            tokens.append(Token(TokenType.STYLED, line))
+            continue
+        media_match = re.match(r"@([a-z]+): *([^ ]+) *! *(.*)", line)
+        if media_match and media_match.group(1) in MediaType._value2member_map_:
+            media_type, url, desc = media_match.groups()
+            tokens.append(Token(TokenType.MEDIA, line, 0, desc, media_type, url))
+            continue
+        custom_list_match = re.match(r"^-([0-9A-Za-z\.]+)\s+(.*)", line)
+        if custom_list_match:
+            list_key, content = custom_list_match.groups()
+            tokens.append(Token(TokenType.CUSTOM_ITEM, line, 0, content, list_key))
+            continue
+        if re.match(r"^\d+\. ", line):
+            tokens.append(Token(TokenType.ORDERED_ITEM, line, 0, re.sub(r'^\d+\. ', '', line)))
+            continue
+        list_match = re.match(r"^(\s*)- (.*)", line)
+        if list_match:
+            indent, content = list_match.groups()
+            tokens.append(Token(TokenType.BULLET_ITEM, line, len(indent) // 2, content))
+            continue
+        dash_list_match = re.match(r"^(-+)\s+(.*)", line)
+        if dash_list_match:
+            dashes, content = dash_list_match.groups()
+            tokens.append(Token(TokenType.BULLET_ITEM, line, len(dashes) - 1, content))
+            continue
+        if line.startswith("### "):
+            tokens.append(Token(TokenType.HEADING, line, 3, line[4:]))
+        elif line.startswith("## "):
+            tokens.append(Token(TokenType.HEADING, line, 2, line[3:]))
+        elif line.startswith("# "):
+            tokens.append(Token(TokenType.HEADING, line, 1, line[2:]))
+        elif stripped == "---":
+            tokens.append(Token(TokenType.RULE, line))
+        elif not stripped:
+            tokens.append(Token(TokenType.BLANK, line))
+        else:
+            tokens.append(Token(TokenType.PARAGRAPH, line, 0, line))
+    return tokens
+
+def measure(label: str, func, lines: list, repeat: int) -> float:
+    """함수를 반복 실행하여 가장 빠른 실행의 초당 처리 줄 수를 출력합니다."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(lines)
+        best = min(best, time.perf_counter() - start)
+    rate = len(lines) / best
+    print(f"{label:<28} {best * 1000:9.1f} ms  {rate:>12,.0f} lines/s")
+    return rate
+
+def render_uncached(lines: list) -> None:
+    """블록 캐시와 스타일 캐시를 비운 뒤 문서 전체를 렌더링합니다."""
+    kiro_renderer._BLOCK_CACHE.clear()
+    kiro_renderer._STYLE_CACHE.clear()
+    kiro_renderer.render_kiro("\n".join(lines))
+
+def split_style_sections(lines: list) -> tuple:
+    """줄 목록을 (스타일 섹션 줄, 나머지 본문 줄)로 나눕니다."""
+    style_text = kiro_renderer.extract_style_text(lines)
+    body = []
+    style_mode = False
+    for line in lines:
+        stripped = line.strip()
+        if style_mode:
+            style_mode = stripped != "<>"
+        elif stripped == "<style>":
+            style_mode = True
+        else:
+            body.append(line)
+    return style_text, body
+
+def write_stream_input(path: str, size: int) -> int:
+    """스타일 섹션 하나 뒤에 샘플 본문을 반복해 size 바이트 이상의 문서를 쓰고 크기를 반환합니다.
+
+    스타일 섹션은 첫 번째 훑기에서 모두 메모리에 모이므로 한 번만 둡니다.
+    """
+    style_text, body = split_style_sections(load_sample())
+    chunk = "\n".join(body) + "\n"
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(style_text + "\n")
+        written = len(style_text) + 1
+        while written < size:
+            written += f.write(chunk)
+    return os.path.getsize(path)
+
+def check_stream_memory() -> None:
+    """write_html의 tracemalloc 최대 사용량이 파일 크기가 커져도 STREAM_MEMORY_BOUND 안에 머무는지 확인합니다."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        input_path = os.path.join(temp_dir, "large.kiro")
+        output_path = os.path.join(temp_dir, "large.html")
+        for multiple in STREAM_FILE_MULTIPLES:
+            size = write_stream_input(input_path, STREAM_MEMORY_BOUND * multiple)
+            tracemalloc.start()
+            try:
+                kiro_renderer.write_html(input_path, output_path)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            print(f"🧠 write_html {size / 1024:,.0f} KB 입력: 최대 {peak / 1024:,.0f} KB")
+            assert peak < STREAM_MEMORY_BOUND, (
+                f"write_html peak {peak} bytes exceeds {STREAM_MEMORY_BOUND} for a {size} byte input")
+
+def main() -> None:
+    sys.stdout.reconfigure(encoding="utf-8")
+    line_count = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    lines = build_document(line_count)
+
+    print(f"📄 {len(lines):,} 줄 문서, {repeat}회 반복 중 최고 기록")
+    before = measure("줄 분류 (기존 정규식 판별)", legacy_classify, lines, repeat)
+    after = measure("줄 분류 (tokenize)", lambda ls: list(kiro_renderer.tokenize(ls)), lines, repeat)
+    measure("블록 분할 (tokenize + split)",
+            lambda ls: list(kiro_renderer.split_blocks(kiro_renderer.tokenize(ls))), lines, repeat)
+    measure("전체 렌더링 (빈 캐시에서 시작)", render_uncached, lines, repeat)
+    print(f"⚡ 줄 분류 속도 {after / before:.2f}배")
+    check_stream_memory()
+
+if __name__ == "__main__":
+    main()
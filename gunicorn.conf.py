@@ -0,0 +1,11 @@
+"""Gunicorn settings, read automatically by `gunicorn app:app`
+
+Preview streams (/api/preview/stream) hold a request thread for as long as
+they are open, and the editor documents behind them live in the process, so
+the app runs as one process with a pool of threads rather than sync workers.
+"""
+import os
+
+workers = 1
+worker_class = 'gthread'
+threads = int(os.environ.get('KIRO_THREADS', '64'))
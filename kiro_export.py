@@ -0,0 +1,204 @@
+"""Kiro 워크스페이스 정적 사이트 내보내기
+
+워크스페이스(예: kiro_files)의 모든 .kiro 문서를 정적 사이트로 내보냅니다.
+모든 페이지가 공유하는 폰트/문서 CSS와 Tailwind 설정 JS는 내용 해시가 붙은 파일로
+한 번만 쓰고, 각 페이지는 이를 참조하는 얇은 HTML만 가집니다. 원본이 바뀐 페이지만
+다시 만들며, 내보낸 모든 페이지로 연결되는 index.html을 함께 씁니다. 최상위에 index.kiro가
+있으면 그 페이지가 index.html이 되고 목록은 _index.html에 씁니다.
+
+사용법: python kiro_export.py 워크스페이스폴더 출력폴더 [작업 프로세스 수]
+"""
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import html
+import sys
+import time
+
+import kiro_renderer
+from kiro_renderer import SHELL_BODY_MARKER, SHELL_CLASS_MARKER
+
+# 공유 자산을 쓰는 출력 폴더 안의 하위 폴더
+ASSET_DIR = "assets"
+
+TAILWIND_CDN = "https://cdn.tailwindcss.com?plugins=typography"
+
+def build_assets() -> Dict[str, str]:
+    """공유 CSS/JS 자산을 만들어 {파일 이름: 내용}으로 반환합니다. 파일 이름에 내용 해시가 붙습니다."""
+    font_styles = kiro_renderer.generate_font_styles()
+    sources = {
+        "css": f"{font_styles['custom_fonts_css']}\n{kiro_renderer.DOCUMENT_CSS}",
+        "js": font_styles["tailwind_config_js"],
+    }
+    assets = {}
+    for ext, content in sources.items():
+        digest = hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+        assets[f"kiro.{digest}.{ext}"] = content
+    return assets
+
+def build_page_shell(title: str, asset_prefix: str, assets: Dict[str, str]) -> Tuple[str, str, str]:
+    """공유 자산을 참조하는 얇은 페이지 셸을 (전역 클래스 앞, 본문 앞, 본문 뒤)로 반환합니다."""
+    font_styles = kiro_renderer.generate_font_styles()
+    css_name = next(name for name in assets if name.endswith(".css"))
+    js_name = next(name for name in assets if name.endswith(".js"))
+    shell = f"""<!DOCTYPE html>
+<html lang="ko">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{html.escape(title)}</title>
+    <script src="{TAILWIND_CDN}"></script>
+    <script src="{asset_prefix}{ASSET_DIR}/{js_name}"></script>
+    {font_styles["google_fonts"]}
+    {font_styles["custom_fonts_links"]}
+    <link rel="stylesheet" href="{asset_prefix}{ASSET_DIR}/{css_name}">
+</head>
+<body class="min-h-screen bg-gray-50 text-gray-800 font-sans">
+    <div class="max-w-3xl mx-auto py-10 px-4 sm:px-6">
+        <article class="prose prose-slate max-w-none {SHELL_CLASS_MARKER}">
+{SHELL_BODY_MARKER}
+        </article>
+    </div>
+</body>
+</html>
+"""
+    head, _, rest = shell.partition(SHELL_CLASS_MARKER)
+    middle, _, tail = rest.partition(SHELL_BODY_MARKER)
+    return head, middle, tail
+
+def page_path(relative: Path) -> Path:
+    """원본 상대 경로에 대응하는 페이지 상대 경로를 반환합니다."""
+    return relative.with_suffix(".html")
+
+def asset_prefix(relative: Path) -> str:
+    """페이지에서 출력 폴더 최상위로 가는 상대 경로 접두사를 반환합니다."""
+    return "../" * (len(relative.parts) - 1)
+
+def index_name(pages: List[Path]) -> str:
+    """목록 페이지 파일 이름을 반환합니다. 문서 페이지와 겹치면 앞에 _를 붙여 비어 있는 이름을 찾습니다."""
+    taken = {page_path(page).as_posix() for page in pages}
+    name = "index.html"
+    while name in taken:
+        name = f"_{name}"
+    return name
+
+def write_assets(output_root: Path, assets: Dict[str, str]) -> None:
+    """공유 자산을 쓰고 이전 내보내기에서 남은 자산을 지웁니다."""
+    asset_root = output_root / ASSET_DIR
+    asset_root.mkdir(parents=True, exist_ok=True)
+    for name, content in assets.items():
+        path = asset_root / name
+        if not path.exists():
+            path.write_text(content, encoding="utf-8")
+    for path in asset_root.glob("kiro.*"):
+        if path.name not in assets:
+            path.unlink()
+
+def build_index(pages: List[Path], assets: Dict[str, str]) -> str:
+    """모든 페이지로 연결되는 목록 페이지를 만듭니다."""
+    head, middle, tail = build_page_shell("Kiro 문서 목록", "", assets)
+    items = "\n".join(
+        f'<li><a href="{html.escape(page_path(page).as_posix())}">{html.escape(page.with_suffix("").as_posix())}</a></li>'
+        for page in pages
+    )
+    body = f"<h1>Kiro 문서 목록</h1>\n<ul>\n{items}\n</ul>"
+    return "".join((head, middle, body, tail))
+
+def export_fingerprint() -> str:
+    """렌더러와 내보내기 코드의 해시를 반환합니다. 바뀌면 모든 페이지를 다시 만듭니다."""
+    combined = kiro_renderer.renderer_hash() + kiro_renderer.file_hash(Path(__file__))
+    return hashlib.sha256(combined.encode("utf-8")).hexdigest()
+
+def _export_page(input_path: str, output_path: str, shell: Tuple[str, str, str]) -> float:
+    """작업 프로세스에서 페이지 하나를 내보내고 걸린 시간(초)을 반환합니다."""
+    start = time.perf_counter()
+    kiro_renderer.write_html(input_path, output_path, shell=shell)
+    return time.perf_counter() - start
+
+def export_workspace(workspace: str, output_dir: str, workers: Optional[int] = None) -> Dict[str, int]:
+    """워크스페이스를 정적 사이트로 내보내고 내보냄/건너뜀/실패 개수를 반환합니다."""
+    input_root = Path(workspace)
+    output_root = Path(output_dir)
+    output_root.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_root / kiro_renderer.MANIFEST_NAME
+
+    assets = build_assets()
+    write_assets(output_root, assets)
+
+    manifest = kiro_renderer.load_manifest(manifest_path)
+    fingerprint = export_fingerprint()
+    previous = manifest.get("files", {}) if manifest.get("renderer") == fingerprint else {}
+
+    sources = kiro_renderer.find_kiro_files(input_root)
+    files = {}
+    pending = []
+    skipped = 0
+    for relative in sources:
+        key = relative.as_posix()
+        source_hash = kiro_renderer.file_hash(input_root / relative)
+        output_path = output_root / page_path(relative)
+        files[key] = source_hash
+        if previous.get(key) == source_hash and output_path.exists():
+            skipped += 1
+            continue
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        shell = build_page_shell(relative.stem, asset_prefix(relative), assets)
+        pending.append((key, input_root / relative, output_path, shell))
+
+    # 원본이 사라진 페이지와, 이름이 바뀐 이전 목록 페이지 삭제
+    listing_name = index_name(sources)
+    stale_pages = [page_path(Path(key)) for key in manifest.get("files", {}) if key not in files]
+    previous_listing = manifest.get("index", "index.html")
+    if previous_listing != listing_name and previous_listing not in {page_path(page).as_posix() for page in sources}:
+        stale_pages.append(Path(previous_listing))
+    for page in stale_pages:
+        stale = output_root / page
+        if stale.exists():
+            stale.unlink()
+
+    print(f"📂 {len(sources)}개 문서 중 {len(pending)}개 내보내기, {skipped}개 건너뜀")
+
+    failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_export_page, str(input_path), str(output_path), shell): key
+            for key, input_path, output_path, shell in pending
+        }
+        for future in as_completed(futures):
+            key = futures[future]
+            try:
+                elapsed = future.result()
+            except Exception as e:
+                failed += 1
+                del files[key]  # 다음 실행에서 다시 시도
+                print(f"❌ {key}: {e}")
+                continue
+            print(f"⏱️ {key}: {elapsed * 1000:.1f} ms")
+    elapsed = time.perf_counter() - start
+
+    # 내보내지 못한 페이지는 목록에서 뺍니다
+    index_path = output_root / listing_name
+    index_html = build_index([relative for relative in sources if relative.as_posix() in files], assets)
+    if not index_path.exists() or index_path.read_text(encoding="utf-8") != index_html:
+        index_path.write_text(index_html, encoding="utf-8")
+
+    kiro_renderer.save_manifest(manifest_path, {"renderer": fingerprint, "files": files, "index": listing_name})
+
+    exported = len(pending) - failed
+    if exported:
+        print(f"⚡ {exported}개 페이지를 {elapsed:.2f}초에 내보냄 ({exported / elapsed:.1f} 페이지/s)")
+    return {"exported": exported, "skipped": skipped, "failed": failed}
+
+if __name__ == "__main__":
+    # Windows 환경에서 UTF-8 출력 강제 설정
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    if len(sys.argv) not in (3, 4):
+        print("📌 사용법: python kiro_export.py 워크스페이스폴더 출력폴더 [작업 프로세스 수]")
+    else:
+        result = export_workspace(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) == 4 else None)
+        print(f"🎉 내보내기 완료: {sys.argv[2]}")
+        if result["failed"]:
+            sys.exit(1)
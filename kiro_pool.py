@@ -0,0 +1,257 @@
+"""Kiro 렌더링 프로세스 풀
+
+렌더링을 미리 띄워 둔 작업 프로세스에서 실행합니다. 렌더링마다 시간 제한과 입력
+크기 제한을 두고, 시간 제한을 넘긴 작업 프로세스는 종료한 뒤 새로 띄웁니다.
+따라서 문제가 있는 문서 하나가 웹 서버 스레드를 붙잡아 두지 못합니다.
+스트리밍 렌더링도 같은 작업 프로세스에서 조각 단위로 받아 옵니다.
+"""
+from typing import Hashable, Iterable, Iterator, List, Optional
+import multiprocessing
+import os
+import threading
+import time
+
+import kiro_renderer
+
+# 같은 문서를 같은 작업 프로세스로 보내기 위해 기억하는 affinity 키 수
+AFFINITY_SIZE = 1024
+
+def _render_blocks(text: str, known: Iterable[str] = ()):
+    """render_kiro_blocks와 같지만, known에 있는 블록은 HTML 대신 None을 담아 돌려보냅니다."""
+    blocks, global_class = kiro_renderer.render_kiro_blocks(text)
+    known = set(known)
+    return [(block_id, None if block_id in known else block_html) for block_id, block_html in blocks], global_class
+
+def _render_stream(text: str) -> Iterator[str]:
+    """전역 클래스를 먼저 생성하고, 이어서 본문 HTML을 블록 단위 조각으로 생성합니다."""
+    style_text, lines = kiro_renderer.split_style_sections(text)
+    parsed = kiro_renderer.load_styles(style_text)
+    yield parsed.global_class
+    yield from kiro_renderer.iter_body_chunks(lines, parsed)
+
+# 작업 프로세스에서 실행할 수 있는 렌더링 함수
+TASKS = {
+    "render": kiro_renderer.render_kiro,
+    "blocks": _render_blocks,
+    "stats": kiro_renderer.cache_info,
+}
+
+# 결과를 조각 단위로 보내는 렌더링 함수: 조각마다 (True, 조각)을, 끝에 (True, None)을 보냅니다
+STREAM_TASKS = {
+    "stream": _render_stream,
+}
+
+class RenderError(Exception):
+    """작업 프로세스에서 렌더링이 실패했습니다."""
+
+class RenderTimeout(RenderError):
+    """렌더링이 시간 제한을 넘겼습니다."""
+
+class DocumentTooLarge(RenderError):
+    """문서가 입력 크기 제한을 넘었습니다."""
+
+def _worker_main(conn) -> None:
+    """작업 프로세스 본체: (작업 이름, 인자)를 받아 (성공 여부, 결과)를 돌려줍니다."""
+    while True:
+        try:
+            request = conn.recv()
+        except EOFError:
+            break
+        if request is None:
+            break
+        task, args = request
+        try:
+            if task in STREAM_TASKS:
+                for chunk in STREAM_TASKS[task](*args):
+                    conn.send((True, chunk))
+                conn.send((True, None))
+            else:
+                conn.send((True, TASKS[task](*args)))
+        except Exception as e:
+            conn.send((False, f"{type(e).__name__}: {e}"))
+
+class _Worker:
+    """파이프로 연결된 작업 프로세스 하나입니다."""
+
+    def __init__(self, context):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def stop(self, timeout: float = 1.0) -> None:
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(timeout)
+        self.kill()
+
+    def kill(self) -> None:
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
+        self.conn.close()
+
+class RenderPool:
+    """시간/크기 제한이 있는 렌더링 작업 프로세스 풀입니다. 여러 스레드에서 함께 사용할 수 있습니다.
+
+    작업 프로세스를 기다리는 시간과 렌더링 시간은 호출마다 timeout초 기한 하나를 함께 씁니다.
+    affinity 키를 주면 그 키의 이전 렌더링을 맡았던 프로세스가 쉬고 있을 때 그 프로세스를 써서,
+    프로세스별 블록/스타일 캐시가 같은 문서에 계속 적중하게 합니다.
+    """
+
+    def __init__(self, workers: Optional[int] = None, timeout: float = 5.0, max_chars: int = 2_000_000):
+        self.timeout = timeout
+        self.max_chars = max_chars
+        # 스레드가 있는 웹 서버에서 fork하면 잠금 상태가 복사될 수 있으므로 spawn을 사용합니다
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._idle: List[_Worker] = []
+        self._workers = set()
+        self._affinity = kiro_renderer.LRUCache(AFFINITY_SIZE)
+        self._closed = False
+        for _ in range(workers or os.cpu_count() or 1):
+            worker = _Worker(self._context)
+            self._workers.add(worker)
+            self._idle.append(worker)
+
+    def _acquire(self, deadline: float, affinity: Optional[Hashable] = None) -> _Worker:
+        """기한까지 쉬는 작업 프로세스를 기다려 꺼냅니다.
+
+        affinity 키에 묶인 프로세스가 쉬고 있으면 그것을, 아니면 가장 오래 쉰 프로세스를 씁니다.
+        """
+        with self._available:
+            while not self._idle:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self._closed:
+                    raise RenderTimeout("No render worker became available in time")
+                self._available.wait(remaining)
+            preferred = self._affinity.get(affinity) if affinity is not None else None
+            worker = preferred if preferred in self._idle else self._idle[0]
+            self._idle.remove(worker)
+            if affinity is not None:
+                self._affinity.put(affinity, worker)
+            return worker
+
+    def _release(self, worker: _Worker) -> None:
+        with self._available:
+            if not self._closed:
+                self._idle.append(worker)
+                self._available.notify_all()
+                return
+        worker.kill()
+
+    def _replace_worker(self, worker: _Worker) -> None:
+        """작업 프로세스를 종료하고 새 프로세스로 바꿉니다."""
+        with self._lock:
+            self._workers.discard(worker)
+        worker.kill()
+        if self._closed:
+            return
+        replacement = _Worker(self._context)
+        with self._lock:
+            self._workers.add(replacement)
+        self._release(replacement)
+
+    def _check_size(self, text: str) -> None:
+        if len(text) > self.max_chars:
+            raise DocumentTooLarge(f"Document exceeds {self.max_chars} characters")
+
+    def _receive(self, worker: _Worker, deadline: float):
+        """작업 프로세스의 응답 하나를 기한까지 기다려 (성공 여부, 결과)를 반환합니다."""
+        try:
+            if worker.conn.poll(max(0.0, deadline - time.monotonic())):
+                return worker.conn.recv()
+        except (EOFError, OSError):
+            # 작업 프로세스가 비정상 종료된 경우
+            raise RenderError("Render worker exited unexpectedly")
+        raise RenderTimeout(f"Render exceeded {self.timeout} seconds")
+
+    def _call(self, worker: _Worker, deadline: float, task: str, args: tuple):
+        """꺼낸 작업 프로세스에서 작업 하나를 실행합니다. 실패하면 프로세스를 바꾸고, 아니면 풀에 돌려놓습니다."""
+        try:
+            worker.conn.send((task, args))
+            ok, result = self._receive(worker, deadline)
+        except BaseException:
+            self._replace_worker(worker)
+            raise
+        self._release(worker)
+        if not ok:
+            raise RenderError(result)
+        return result
+
+    def submit(self, task: str, text: str, *args, affinity: Optional[Hashable] = None):
+        """작업 프로세스에서 렌더링 함수를 실행하고 결과를 반환합니다."""
+        self._check_size(text)
+        deadline = time.monotonic() + self.timeout
+        worker = self._acquire(deadline, affinity)
+        return self._call(worker, deadline, task, (text,) + args)
+
+    def render(self, text: str, affinity: Optional[Hashable] = None):
+        """render_kiro와 같은 (본문 HTML, 전역 클래스)를 반환합니다."""
+        return self.submit("render", text, affinity=affinity)
+
+    def render_blocks(self, text: str, known: Iterable[str] = (), affinity: Optional[Hashable] = None):
+        """render_kiro_blocks와 같은 (블록 목록, 전역 클래스)를 반환합니다.
+
+        known에 있는 블록 ID는 HTML을 다시 보내지 않고 (블록 ID, None)으로 돌려줍니다.
+        """
+        return self.submit("blocks", text, frozenset(known), affinity=affinity)
+
+    def render_stream(self, text: str, affinity: Optional[Hashable] = None) -> Iterator[str]:
+        """전역 클래스를 먼저, 이어서 본문 HTML 조각을 생성합니다.
+
+        스트림 전체가 timeout초 기한 하나를 씁니다. 끝까지 읽지 않고 닫거나 기한을 넘기면
+        작업 프로세스를 바꿉니다. 크기 제한과 대기 시간 초과는 첫 조각을 받을 때 발생합니다.
+        """
+        self._check_size(text)
+        deadline = time.monotonic() + self.timeout
+        worker = self._acquire(deadline, affinity)
+        try:
+            worker.conn.send(("stream", (text,)))
+            while True:
+                ok, chunk = self._receive(worker, deadline)
+                if not ok or chunk is None:
+                    break
+                yield chunk
+        except BaseException:
+            self._replace_worker(worker)
+            raise
+        self._release(worker)
+        if not ok:
+            raise RenderError(chunk)
+
+    def stats(self) -> List[dict]:
+        """작업 프로세스마다 블록/스타일 캐시 통계(cache_info)를 모아 반환합니다.
+
+        바쁜 프로세스는 timeout초 기한까지 쉬기를 기다리고, 그때까지 끝나지 않으면 건너뜁니다.
+        """
+        deadline = time.monotonic() + self.timeout
+        with self._lock:
+            workers = list(self._workers)
+        results = []
+        for worker in workers:
+            with self._available:
+                while worker not in self._idle and worker in self._workers and not self._closed:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._available.wait(remaining)
+                if worker not in self._idle:
+                    continue
+                self._idle.remove(worker)
+            results.append(self._call(worker, deadline, "stats", ()))
+        return results
+
+    def close(self) -> None:
+        """모든 작업 프로세스를 종료합니다. 작업 중인 프로세스는 작업이 끝나면 종료합니다."""
+        with self._available:
+            self._closed = True
+            workers = list(self._idle)
+            self._idle.clear()
+            self._workers.clear()
+            self._available.notify_all()
+        for worker in workers:
+            worker.stop()
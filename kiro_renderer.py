@@ -1,14 +1,21 @@
-from typing import Dict, List, Optional, Tuple, Union
+from typing import Callable, Dict, Hashable, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Tuple, Union
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
+import hashlib
+import json
+import os
 import re
-import textwrap
+import logging
+import threading
+import time
 import sys
-import io
 from enum import Enum
 
-# Windows 환경에서 UTF-8 출력 강제 설정
-sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+# 렌더링 진행 메시지는 로거로 보냅니다 (CLI에서는 표준 출력으로 출력)
+logger = logging.getLogger(__name__)
 
 class MediaType(Enum):
     IMAGE = "image"
@@ -25,10 +32,23 @@ class FontConfig:
 
 @dataclass
 class StyleResult:
-    class_list: List[str]
+    class_str: str
     style_attr: str
     rendered: str
 
+@dataclass(frozen=True)
+class CompiledStyle:
+    classes: Tuple[str, ...]  # 상속이 적용된 원본 클래스
+    class_str: str
+    style_attr: str
+    icon_prefix: str
+    md_structure: Optional[str]
+    color_classes: Tuple[str, ...]
+    wrappers: Tuple[Tuple[str, str], ...]  # 감싸기 계획 (compile_wrappers 참고)
+
+# 스타일 경로 -> CompiledStyle
+StyleTable = Mapping[str, CompiledStyle]
+
 # 폰트 설정: Tailwind 클래스와 매핑
 FONT_CONFIG: Dict[str, FontConfig] = {
     "RIDIBatang": FontConfig(
@@ -97,6 +117,101 @@ pre, code {
 </style>
 """
 
+# 블록 캐시에 보관할 최대 블록 수
+BLOCK_CACHE_SIZE = 16384
+
+# 스타일 캐시에 보관할 최대 스타일 블록 수
+STYLE_CACHE_SIZE = 256
+
+# 배치 변환 시 출력 디렉터리에 저장하는 매니페스트 파일 이름
+MANIFEST_NAME = ".kiro-manifest.json"
+
+# 감시 모드의 확인 주기와 연속 저장을 묶는 대기 시간 (초)
+WATCH_INTERVAL = 0.5
+WATCH_DEBOUNCE = 0.3
+
+class LRUCache:
+    """크기 제한이 있는 스레드 안전 LRU 캐시입니다.
+
+    weigh를 주면 항목 개수 대신 weigh(값)의 합(예: 바이트 수)을 maxsize 이하로 유지합니다.
+    """
+
+    def __init__(self, maxsize: int, weigh: Optional[Callable[[object], int]] = None):
+        self.maxsize = maxsize
+        self._weigh = weigh
+        self._data: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._weights: Dict[Hashable, int] = {}
+        self._lock = threading.Lock()
+        self.weight = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value) -> None:
+        weight = self._weigh(value) if self._weigh else 1
+        with self._lock:
+            if key in self._data:
+                del self._data[key]
+                self.weight -= self._weights.pop(key)
+            if weight > self.maxsize:
+                return  # 캐시 전체보다 큰 항목은 보관하지 않음
+            self._data[key] = value
+            self._weights[key] = weight
+            self.weight += weight
+            while self.weight > self.maxsize:
+                old_key, _ = self._data.popitem(last=False)
+                self.weight -= self._weights.pop(old_key)
+                self.evictions += 1
+
+    def pop(self, key: Hashable, default=None):
+        """항목을 꺼내 제거합니다. 없으면 default를 반환합니다."""
+        with self._lock:
+            if key not in self._data:
+                return default
+            self.weight -= self._weights.pop(key)
+            return self._data.pop(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._weights.clear()
+            self.weight = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def info(self) -> Dict[str, int]:
+        """적중/실패/제거 횟수와 현재 크기를 반환합니다."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._data),
+                "weight": self.weight,
+                "maxsize": self.maxsize
+            }
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+# 블록 소스 + 스타일 블록 해시 -> 렌더링된 블록 HTML
+_BLOCK_CACHE = LRUCache(BLOCK_CACHE_SIZE)
+
+# 스타일 블록 해시 -> ParsedStyles
+_STYLE_CACHE = LRUCache(STYLE_CACHE_SIZE)
+
 # 기본 색상 매핑
 BASIC_COLORS = {
     "red": "text-red-600",
@@ -118,6 +233,69 @@ BASIC_COLORS = {
     "white": "text-white"
 }
 
+# 인라인 구분자 -> (여는 태그, 닫는 태그)
+INLINE_TAGS = {
+    "~~": ("<del class='line-through'>", "</del>"),  # 취소선
+    "==": ("<mark class='bg-yellow-200'>", "</mark>"),  # 하이라이트
+    "**": ("<strong class='font-bold'>", "</strong>"),  # 굵게
+    "_": ("<em class='italic'>", "</em>"),  # 기울임
+}
+INLINE_CODE_TAG = "<code class='px-1 py-0.5 bg-gray-100 text-sm rounded font-jetbrains'>"  # 코드
+_INLINE_DELIMITER_RE = re.compile(r"~~|==|\*\*|_|`")
+
+# 스타일 선언 패턴
+_STYLE_STRUCTURE_RE = re.compile(r"\{([^}]+)\}")
+_STYLE_ATTRIBUTE_PATTERNS = [
+    (re.compile(r"\[=([^\]]+)\]"), ""),  # 폰트
+    (re.compile(r"\[#([^\]]+)\]"), "#"),  # 색상
+    (re.compile(r"\[\+([^\]]+)\]"), "+"),  # 아이콘
+    (re.compile(r"\[\$([^\]]+)\]"), ""),  # Tailwind
+]
+
+# 스타일 섹션 경계 (줄 전체가 `<style>` 또는 `<>`인 경우)
+_STYLE_OPEN_RE = re.compile(r"^[^\S\n]*<style>[^\S\n]*$", re.MULTILINE)
+_STYLE_CLOSE_RE = re.compile(r"^[^\S\n]*<>[^\S\n]*$", re.MULTILINE)
+
+# 스타일의 마크다운 구조 {...}를 이루는 기호
+MD_STRUCTURE_CHARS = frozenset("#*_`->|~=^[]()")
+
+# 마크다운 구조 요소 적용 우선순위
+MD_STRUCTURE_PRIORITY = {
+    '#': 1, '##': 2, '###': 3,  # 헤딩
+    '>': 4,  # 인용
+    '-': 5,  # 리스트
+    '|': 6,  # 단락
+    '**': 7, '_': 8,  # 강조
+    '`': 9,  # 코드
+    '~~': 10, '==': 11  # 기타
+}
+
+# 마크다운 구조 요소 -> (여는 태그, 닫는 태그)
+MD_HEADING_TAGS = {
+    1: ("<h1 class='mt-6 mb-4 text-4xl font-bold'>", "</h1>"),
+    2: ("<h2 class='mt-5 mb-3 text-3xl font-bold'>", "</h2>"),
+    3: ("<h3 class='mt-4 mb-2 text-2xl font-bold'>", "</h3>"),
+}
+MD_STRUCTURE_TAGS = {
+    '**': INLINE_TAGS["**"],
+    '_': INLINE_TAGS["_"],
+    '`': (INLINE_CODE_TAG, "</code>"),
+    '-': ("<li class='ml-6'>", "</li>"),
+    '>': ("<blockquote class='my-4 border-l-4 pl-4 italic text-gray-600'>", "</blockquote>"),
+    '|': ("<p class='mb-4'>", "</p>"),
+    '~~': INLINE_TAGS["~~"],
+    '==': INLINE_TAGS["=="],
+}
+
+# 내용에 이미 같은 태그가 있으면 생략하는 요소 (순서가 계획의 비트 순서)
+MD_GUARDED_TAGS = {'**': '<strong', '_': '<em', '`': '<code'}
+
+_STRONG_RE = re.compile(r"<strong class='font-bold'>(.*?)</strong>")
+
+# 줄 단위 패턴
+_TOGGLE_RE = re.compile(r"(#{1,6})?\s*(>{1,})\s*(.+)")
+_MEDIA_RE = re.compile(r"@([a-z]+): *([^ ]+) *! *(.*)")
+
 def extract_font_family(classes: List[str]) -> Optional[str]:
     """클래스에서 폰트 패밀리를 추출합니다."""
     for cls in classes:
@@ -137,28 +315,179 @@ def extract_color(classes: List[str]) -> Optional[str]:
     return None
 
 def apply_inline_styles(text: str) -> str:
-    """인라인 스타일을 적용합니다."""
-    # 중첩된 마크다운 구문을 처리하기 위해 순서대로 처리
-    patterns = [
-        (r"~~(.*?)~~", r"<del class='line-through'>\1</del>"),  # 취소선
-        (r"==(.*?)==", r"<mark class='bg-yellow-200'>\1</mark>"),  # 하이라이트
-        (r"\*\*(.*?)\*\*", r"<strong class='font-bold'>\1</strong>"),  # 굵게
-        (r"_(.*?)_", r"<em class='italic'>\1</em>"),  # 기울임
-        (r"`(.*?)`", r"<code class='px-1 py-0.5 bg-gray-100 text-sm rounded font-jetbrains'>\1</code>")  # 코드
-    ]
+    """인라인 스타일을 적용합니다.
+
+    구분자 스택으로 텍스트를 한 번만 훑어 O(n)에 처리합니다. 같은 구분자가 다시
+    나오면 가장 가까운 여는 구분자와 짝을 이루고, 그 사이에 열린 채 남은 구분자는
+    그대로 출력됩니다. 백틱 코드 스팬 내부는 해석하지 않습니다.
+    """
+    match = _INLINE_DELIMITER_RE.search(text)
+    if match is None:
+        return text
+
+    out = []
+    openers = []  # (구분자, out에서의 위치)
+    pos = 0
+    while match is not None:
+        start = match.start()
+        if start > pos:
+            out.append(text[pos:start])
+        marker = match.group()
+        pos = match.end()
+
+        if marker == "`":
+            close = text.find("`", pos)
+            if close == -1:
+                out.append(marker)
+            else:
+                out.append(f"{INLINE_CODE_TAG}{text[pos:close]}</code>")
+                pos = close + 1
+        else:
+            for index in range(len(openers) - 1, -1, -1):
+                if openers[index][0] == marker:
+                    open_tag, close_tag = INLINE_TAGS[marker]
+                    out[openers[index][1]] = open_tag
+                    out.append(close_tag)
+                    del openers[index:]
+                    break
+            else:
+                openers.append((marker, len(out)))
+                out.append(marker)
+
+        match = _INLINE_DELIMITER_RE.search(text, pos)
+
+    out.append(text[pos:])
+    return "".join(out)
+
+def parse_style_value(val: str) -> Tuple[List[str], Optional[str]]:
+    """스타일 선언의 값에서 클래스 목록과 마크다운 구조를 추출합니다."""
+    classes = []
+    md_structure = None
+
+    # 마크다운 구조 추출
+    structure_match = _STYLE_STRUCTURE_RE.search(val)
+    if structure_match:
+        md_structure = structure_match.group(1)
+
+    # 스타일 속성 파싱
+    for pattern, prefix in _STYLE_ATTRIBUTE_PATTERNS:
+        for match in pattern.finditer(val):
+            classes.append(prefix + match.group(1))
+
+    return classes, md_structure
+
+def merge_style_classes(classes: List[str], overrides: List[str]) -> List[str]:
+    """하위 스타일의 클래스로 상위 스타일의 클래스를 덮어씁니다."""
+    result = list(classes)
+    for cls in overrides:
+        # 폰트, 색상, 아이콘은 하나만 유지
+        if cls in FONT_CONFIG:
+            result = [c for c in result if c not in FONT_CONFIG]
+        elif cls.startswith('#'):
+            result = [c for c in result if not c.startswith('#')]
+        elif cls.startswith('+'):
+            result = [c for c in result if not c.startswith('+')]
+        result.append(cls)
+    return result
+
+def parse_md_structure(md_structure: str) -> List[str]:
+    """마크다운 구조를 적용 순서대로 정렬된 요소 목록으로 파싱합니다."""
+    md_elements = []
+    current_element = ""
     
-    # 중첩된 패턴을 처리하기 위해 여러 번 반복
-    prev_text = None
-    current_text = text
-    while prev_text != current_text:
-        prev_text = current_text
-        for pattern, replacement in patterns:
-            current_text = re.sub(pattern, replacement, current_text)
+    # 마크다운 구조를 파싱하여 요소 목록 생성
+    for char in md_structure:
+        if char in MD_STRUCTURE_CHARS:
+            if current_element:
+                md_elements.append(current_element)
+            current_element = char
+        else:
+            current_element += char
     
-    return current_text
+    if current_element:
+        md_elements.append(current_element)
+        
+    # 중복된 마크다운 요소 제거 후 우선순위에 따라 정렬
+    md_elements = list(dict.fromkeys(md_elements))
+    md_elements.sort(key=lambda x: MD_STRUCTURE_PRIORITY.get(x, 999))
+    return md_elements
+
+def compile_wrappers(md_structure: Optional[str], icon_prefix: str) -> Tuple[Tuple[str, str], ...]:
+    """마크다운 구조와 아이콘 접두사를 (여는 태그, 닫는 태그) 감싸기 계획으로 만듭니다.
+
+    `**`, `_`, `` ` `` 요소는 내용에 같은 태그가 이미 있으면 생략되므로, 이런 요소가
+    있으면 <strong, <em, <code 포함 여부를 비트로 나타낸 8가지 계획을 만듭니다.
+    """
+    md_elements = parse_md_structure(md_structure) if md_structure else []
+    tags = []
+    for element in md_elements:
+        if element.startswith('#'):
+            tag = MD_HEADING_TAGS.get(len(element))
+        else:
+            tag = MD_STRUCTURE_TAGS.get(element)
+        if tag:
+            tags.append((element, tag))
+
+    # 리스트 항목인 경우 리스트 컨테이너 추가
+    if '-' in md_elements:
+        tags.append(("", ("<ul class='list-disc ml-6 mb-4'>", "</ul>")))
+
+    guarded = any(element in MD_GUARDED_TAGS for element, _ in tags)
+    wrappers = []
+    for variant in range(8 if guarded else 1):
+        present = {guard for bit, guard in enumerate(MD_GUARDED_TAGS.values()) if variant >> bit & 1}
+        opening = ""
+        closing = ""
+        for element, (open_tag, close_tag) in tags:
+            if MD_GUARDED_TAGS.get(element) in present:
+                continue
+            opening = open_tag + opening
+            closing = closing + close_tag
+        wrappers.append((icon_prefix + opening, closing))
+    return tuple(wrappers)
+
+def compile_style(classes: List[str], md_structure: Optional[str]) -> CompiledStyle:
+    """병합된 클래스 목록으로 최종 클래스 문자열과 속성을 미리 계산합니다."""
+    class_list = []
+    icon_prefix = ""
+    style_attr = ""
+
+    for style in classes:
+        if style.startswith('+'):
+            icon_prefix = f"{style[1:]} "
+        elif style.startswith('#'):
+            color_attr = extract_color([style])
+            if color_attr and color_attr.startswith('text-'):
+                class_list.append(color_attr)
+            elif color_attr:
+                style_attr = color_attr
+        elif style in FONT_CONFIG:
+            class_list.append(get_font_class(style))
+        elif style == "MonoplexKR-Regular":  # 특수 케이스 처리
+            class_list.append("font-monoplex")
+        else:
+            class_list.append(style)
+
+    # 기본 마진 추가
+    if not any(cls.startswith("m") for cls in class_list):
+        class_list.append("mb-4")
 
-def parse_styles(lines: List[str]) -> Dict:
-    """스타일 정의를 파싱합니다."""
+    return CompiledStyle(
+        classes=tuple(classes),
+        class_str=" ".join(class_list),
+        style_attr=style_attr,
+        icon_prefix=icon_prefix,
+        md_structure=md_structure,
+        color_classes=tuple(cls for cls in classes if cls.startswith('text-')),
+        wrappers=compile_wrappers(md_structure, icon_prefix)
+    )
+
+def parse_styles(lines: List[str]) -> StyleTable:
+    """스타일 정의를 파싱합니다.
+
+    `기본`, `기본:하위`, `기본:하위:하위하위` 경로마다 상속을 미리 적용한
+    CompiledStyle을 담은 읽기 전용 테이블을 반환합니다.
+    """
     styles = {}
     style_mode = False
     current_parent = None
@@ -172,174 +501,61 @@ def parse_styles(lines: List[str]) -> Dict:
         elif stripped == "<>":
             style_mode = False
             continue
-            
-        if style_mode:
-            if "=" in line and not line.strip().startswith(":"):
-                key, val = line.split("=", 1)
-                key = key.strip("[] ")
-                
-                classes = []
-                md_structure = None
-                
-                # 마크다운 구조 추출
-                structure_match = re.search(r"\{([^}]+)\}", val)
-                if structure_match:
-                    md_structure = structure_match.group(1)
-                    
-                # 스타일 속성 파싱
-                for pattern, extractor in [
-                    (r"\[=([^\]]+)\]", lambda m: classes.append(m.group(1))),  # 폰트
-                    (r"\[#([^\]]+)\]", lambda m: classes.append(f"#{m.group(1)}")),  # 색상
-                    (r"\[\+([^\]]+)\]", lambda m: classes.append(f"+{m.group(1)}")),  # 아이콘
-                    (r"\[\$([^\]]+)\]", lambda m: classes.append(m.group(1)))  # Tailwind
-                ]:
-                    for match in re.finditer(pattern, val):
-                        extractor(match)
-                
-                styles[key] = {
+
+        if not style_mode or "=" not in line:
+            continue
+
+        key, val = line.split("=", 1)
+        classes, md_structure = parse_style_value(val)
+        if not stripped.startswith(":"):
+            key = key.strip("[] ")
+            styles[key] = {
+                "classes": classes,
+                "md_structure": md_structure,
+                "children": {}
+            }
+            current_parent = key
+            current_child = None
+        elif not stripped.startswith("::"):
+            if current_parent:
+                child_key = key.strip(": ")
+                styles[current_parent]["children"][child_key] = {
                     "classes": classes,
                     "md_structure": md_structure,
-                    "children": {}
+                    "grandchildren": {}
                 }
-                current_parent = key
-                
-            elif "=" in line and line.strip().startswith(":") and not line.strip().startswith("::"):
-                if current_parent:
-                    child_key, val = line.split("=", 1)
-                    child_key = child_key.strip(": ")
-                    
-                    classes = []
-                    md_structure = None
-                    
-                    # 마크다운 구조 추출
-                    structure_match = re.search(r"\{([^}]+)\}", val)
-                    if structure_match:
-                        md_structure = structure_match.group(1)
-                    
-                    # 스타일 속성 파싱
-                    for pattern, extractor in [
-                        (r"\[=([^\]]+)\]", lambda m: classes.append(m.group(1))),
-                        (r"\[#([^\]]+)\]", lambda m: classes.append(f"#{m.group(1)}")),
-                        (r"\[\+([^\]]+)\]", lambda m: classes.append(f"+{m.group(1)}")),
-                        (r"\[\$([^\]]+)\]", lambda m: classes.append(m.group(1)))
-                    ]:
-                        for match in re.finditer(pattern, val):
-                            extractor(match)
-                    
-                    styles[current_parent]["children"][child_key] = {
-                        "classes": classes,
-                        "md_structure": md_structure
-                    }
-                    current_child = child_key
-                    
-            elif "=" in line and line.strip().startswith("::"):
-                if current_parent and current_child:
-                    child_child_key, val = line.split("=", 1)
-                    child_child_key = child_child_key.strip(": ")
-                    
-                    classes = []
-                    md_structure = None
-                    
-                    # 마크다운 구조 추출
-                    structure_match = re.search(r"\{([^}]+)\}", val)
-                    if structure_match:
-                        md_structure = structure_match.group(1)
-                    
-                    # 스타일 속성 파싱
-                    for pattern, extractor in [
-                        (r"\[=([^\]]+)\]", lambda m: classes.append(m.group(1))),
-                        (r"\[#([^\]]+)\]", lambda m: classes.append(f"#{m.group(1)}")),
-                        (r"\[\+([^\]]+)\]", lambda m: classes.append(f"+{m.group(1)}")),
-                        (r"\[\$([^\]]+)\]", lambda m: classes.append(m.group(1)))
-                    ]:
-                        for match in re.finditer(pattern, val):
-                            extractor(match)
-                    
-                    if "grandchildren" not in styles[current_parent]["children"][current_child]:
-                        styles[current_parent]["children"][current_child]["grandchildren"] = {}
-                        
-                    styles[current_parent]["children"][current_child]["grandchildren"][child_child_key] = {
-                        "classes": classes,
-                        "md_structure": md_structure
-                    }
-
-    return styles
-
-def get_style_classes(style_name: str, styles: Dict) -> Dict:
+                current_child = child_key
+        elif current_parent and current_child:
+            grandchild_key = key.strip(": ")
+            styles[current_parent]["children"][current_child]["grandchildren"][grandchild_key] = {
+                "classes": classes,
+                "md_structure": md_structure
+            }
+
+    # 모든 경로를 미리 병합해 평탄한 테이블로 만듭니다
+    table = {}
+    for base, style in styles.items():
+        table[base] = compile_style(style["classes"], style["md_structure"])
+        for child, child_style in style["children"].items():
+            child_classes = merge_style_classes(style["classes"], child_style["classes"])
+            child_structure = child_style["md_structure"] or style["md_structure"]
+            table[f"{base}:{child}"] = compile_style(child_classes, child_structure)
+            for grandchild, grandchild_style in child_style["grandchildren"].items():
+                compiled = compile_style(
+                    merge_style_classes(child_classes, grandchild_style["classes"]),
+                    grandchild_style["md_structure"] or child_structure
+                )
+                table[f"{base}:{child}:{grandchild}"] = compiled
+                table[f"{base}:{child}::{grandchild}"] = compiled  # 문서의 표기법
+
+    return MappingProxyType(table)
+
+def get_style_classes(style_name: str, styles: StyleTable) -> Dict:
     """스타일 클래스를 가져옵니다."""
-    parts = style_name.split(':')
-    base_style = parts[0]
-    
-    result = {
-        "classes": [],
-        "md_structure": None
-    }
-    
-    if base_style not in styles:
-        return result
-    
-    # Start with base style
-    result["classes"] = styles[base_style]["classes"].copy()
-    result["md_structure"] = styles[base_style].get("md_structure")
-    
-    # Apply child style if specified
-    if len(parts) > 1 and parts[1] in styles[base_style]["children"]:
-        child_style = styles[base_style]["children"][parts[1]]
-        
-        # For each class in child classes, check if it should override a parent class
-        if "classes" in child_style:
-            # Handle font, color, and icon overrides
-            for child_class in child_style["classes"]:
-                # For fonts ([=Font])
-                if any(child_class == font_name for font_name in FONT_CONFIG):
-                    result["classes"] = [cls for cls in result["classes"] 
-                                        if not any(cls == font_name for font_name in FONT_CONFIG)]
-                    result["classes"].append(child_class)
-                # For colors ([#color])
-                elif child_class.startswith('#'):
-                    result["classes"] = [cls for cls in result["classes"] if not cls.startswith('#')]
-                    result["classes"].append(child_class)
-                # For icons ([+icon])
-                elif child_class.startswith('+'):
-                    result["classes"] = [cls for cls in result["classes"] if not cls.startswith('+')]
-                    result["classes"].append(child_class)
-                else:
-                    # For other Tailwind classes, just add them
-                    result["classes"].append(child_class)
-        
-        # Override markdown structure if defined in child
-        if child_style.get("md_structure"):
-            result["md_structure"] = child_style["md_structure"]
-        
-        # Apply grandchild style if specified
-        if len(parts) > 2 and "grandchildren" in child_style and parts[2] in child_style["grandchildren"]:
-            grandchild_style = child_style["grandchildren"][parts[2]]
-            
-            # Same logic for grandchild classes
-            if "classes" in grandchild_style:
-                for gc_class in grandchild_style["classes"]:
-                    # For fonts
-                    if any(gc_class == font_name for font_name in FONT_CONFIG):
-                        result["classes"] = [cls for cls in result["classes"] 
-                                           if not any(cls == font_name for font_name in FONT_CONFIG)]
-                        result["classes"].append(gc_class)
-                    # For colors
-                    elif gc_class.startswith('#'):
-                        result["classes"] = [cls for cls in result["classes"] if not cls.startswith('#')]
-                        result["classes"].append(gc_class)
-                    # For icons
-                    elif gc_class.startswith('+'):
-                        result["classes"] = [cls for cls in result["classes"] if not cls.startswith('+')]
-                        result["classes"].append(gc_class)
-                    else:
-                        # For other classes, just add them
-                        result["classes"].append(gc_class)
-            
-            # Override markdown structure if defined in grandchild
-            if grandchild_style.get("md_structure"):
-                result["md_structure"] = grandchild_style["md_structure"]
-    
-    return result
+    style = styles.get(style_name)
+    if style is None:
+        return {"classes": [], "md_structure": None}
+    return {"classes": list(style.classes), "md_structure": style.md_structure}
 
 def generate_font_styles() -> Dict[str, str]:
     """폰트 스타일을 생성합니다."""
@@ -374,9 +590,7 @@ def generate_font_styles() -> Dict[str, str]:
 <link href="https://fonts.googleapis.com/css2?family={fonts_str}&display=swap" rel="stylesheet">
 """
     
-    tailwind_config = """
-<script>
-tailwind.config = {
+    tailwind_config_js = """tailwind.config = {
   theme: {
     extend: {
       fontFamily: {
@@ -388,13 +602,12 @@ tailwind.config = {
         class_name = font.class_name.replace("font-", "")
         if class_name not in processed_class_names:
             processed_class_names.add(class_name)
-            tailwind_config += f"        '{class_name}': ['{font.family}', ...tailwind.defaultTheme.fontFamily.sans],\n"
+            tailwind_config_js += f"        '{class_name}': ['{font.family}', ...tailwind.defaultTheme.fontFamily.sans],\n"
     
-    tailwind_config += """      }
+    tailwind_config_js += """      }
     }
   }
 }
-</script>
 """
     
     code_style = f"""
@@ -406,24 +619,137 @@ pre, code {{
     custom_fonts_style = "\n".join([css for css in custom_fonts_css if not css.startswith('<link')])
     custom_fonts_links = "\n".join([css for css in custom_fonts_css if css.startswith('<link')])
     
+    fonts_css = f"{custom_fonts_style}\n{code_style}"
+    
     return {
         "google_fonts": google_fonts_link,
         "custom_fonts_links": custom_fonts_links,
-        "custom_fonts": f"<style>\n{custom_fonts_style}\n{code_style}\n</style>",
-        "tailwind_config": tailwind_config
+        "custom_fonts_css": fonts_css,
+        "custom_fonts": f"<style>\n{fonts_css}\n</style>",
+        "tailwind_config_js": tailwind_config_js,
+        "tailwind_config": f"\n<script>\n{tailwind_config_js}</script>\n"
     }
 
 def get_font_class(font_name: str) -> str:
     """폰트 이름에서 Tailwind 클래스를 반환합니다."""
     return FONT_CONFIG.get(font_name, FONT_CONFIG["default"]).class_name
 
+# 커스텀 리스트/토글/헤딩 스타일
+DOCUMENT_CSS = """
+/* 커스텀 리스트 스타일 */
+.prose :where(ul.custom-list):not(:where([class~="not-prose"] *)) {
+    list-style-type: none;
+    padding-left: 0em;
+}
+
+/* 헤딩 마진 조정 */
+.prose :where(h1, h2, h3, h4, h5, h6):not(:where([class~="not-prose"] *)) {
+    margin-bottom: 0.3em;
+}
+
+.prose :where(ul.custom-list li):not(:where([class~="not-prose"] *)) {
+    display: flex;
+    align-items: baseline;
+    margin-top: 0.5em;
+    margin-bottom: 0.5em;
+}
+.prose :where(ul.custom-list li span):not(:where([class~="not-prose"] *)) {
+    font-family: 'JetBrains Mono', monospace;
+    color: #6b7280;
+    margin-right: 0.5em;
+    min-width: 3em;
+    display: inline-block;
+    text-align: right;
+}
+
+/* 토글 스타일 개선 */
+details {
+    position: relative;
+    margin: 0em 0;
+    padding-left: 1em;
+}
+
+details::before {
+    content: none;
+}
+
+details > div {
+    position: relative;
+    margin-left: 1em;
+    padding-left: 1em;
+}
+
+details > div::before {
+    content: '';
+    position: absolute;
+    left: -1em;
+    top: 0;
+    bottom: 0;
+    width: 2px;
+    background-color: #e5e7eb;
+    border-radius: 1px;
+}
+
+details summary {
+    margin-bottom: 0.5em;
+}
+"""
+
+# 클라이언트가 셸에서 치환하는 자리표시자
+SHELL_CLASS_MARKER = "<!--kiro:global-class-->"
+SHELL_BODY_MARKER = "<!--kiro:body-->"
+
+def build_document_shell() -> str:
+    """렌더링 문서의 셸(head, 폰트, Tailwind 설정, 커스텀 CSS)을 생성합니다."""
+    font_styles = generate_font_styles()
+    return f"""<!DOCTYPE html>
+<html lang="ko">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Kiro Rendered Document</title>
+    <script src="https://cdn.tailwindcss.com?plugins=typography"></script>
+    {font_styles["google_fonts"]}
+    {font_styles["custom_fonts_links"]}
+    {font_styles["custom_fonts"]}
+    {font_styles["tailwind_config"]}
+    <style type="text/css">{DOCUMENT_CSS}</style>
+</head>
+<body class="min-h-screen bg-gray-50 text-gray-800 font-sans">
+    <div class="max-w-3xl mx-auto py-10 px-4 sm:px-6">
+        <article class="prose prose-slate max-w-none {SHELL_CLASS_MARKER}">
+{SHELL_BODY_MARKER}
+        </article>
+    </div>
+</body>
+</html>
+"""
+
+# 셸은 FONT_CONFIG에만 의존하므로 임포트 시 한 번만 생성합니다.
+DOCUMENT_SHELL = build_document_shell()
+DOCUMENT_SHELL_ETAG = hashlib.sha256(DOCUMENT_SHELL.encode("utf-8")).hexdigest()[:32]
+_SHELL_HEAD, _, _SHELL_REST = DOCUMENT_SHELL.partition(SHELL_CLASS_MARKER)
+_SHELL_MIDDLE, _, _SHELL_TAIL = _SHELL_REST.partition(SHELL_BODY_MARKER)
+
+def build_document(html_body: str, global_class_str: str) -> str:
+    """렌더링된 본문을 문서 셸로 감싸 완전한 HTML 문서를 만듭니다."""
+    return "".join((_SHELL_HEAD, global_class_str, _SHELL_MIDDLE, html_body, _SHELL_TAIL))
+
+def iter_document(global_class_str: str, body_chunks: Iterable[str]) -> Iterator[str]:
+    """본문 조각을 문서 셸로 감싸 전체 HTML 문서를 조각 단위로 생성합니다."""
+    yield _SHELL_HEAD + global_class_str + _SHELL_MIDDLE
+    yield from body_chunks
+    yield _SHELL_TAIL
+
 def render_media(line: str) -> Optional[str]:
     """미디어 요소를 렌더링합니다."""
-    media_match = re.match(r"@([a-z]+): *([^ ]+) *! *(.*)", line)
+    media_match = _MEDIA_RE.match(line)
     if not media_match:
         return None
-        
-    media_type, url, desc = media_match.groups()
+    return render_media_element(*media_match.groups())
+
+def render_media_element(media_type: str, url: str, desc: str) -> Optional[str]:
+    """미디어 타입, URL, 설명으로 미디어 요소를 렌더링합니다."""
     url = url.strip()
     desc = desc.strip()
     
@@ -432,16 +758,15 @@ def render_media(line: str) -> Optional[str]:
     except ValueError:
         return None
     
-    media_templates = {
-        MediaType.IMAGE: f'<figure class="my-4"><img src="{url}" alt="{desc}" title="{desc}" class="rounded-md"/><figcaption class="text-center text-sm text-gray-600 mt-1">{desc}</figcaption></figure>',
-        MediaType.AUDIO: f'<figure class="my-4"><audio controls src="{url}" title="{desc}" class="mt-1 w-full"></audio><figcaption class="text-center text-sm text-gray-600 mt-1">{desc}</figcaption></figure>',
-        MediaType.VIDEO: f'<figure class="my-4"><video controls src="{url}" title="{desc}" class="rounded-md mt-1 w-full"></video><figcaption class="text-center text-sm text-gray-600 mt-1">{desc}</figcaption></figure>',
-        MediaType.LINK: f'<a href="{url}" class="text-blue-600 underline" title="{desc}">{desc}</a>'
-    }
-    
-    return media_templates.get(media_type_enum)
+    if media_type_enum is MediaType.IMAGE:
+        return f'<figure class="my-4"><img src="{url}" alt="{desc}" title="{desc}" class="rounded-md"/><figcaption class="text-center text-sm text-gray-600 mt-1">{desc}</figcaption></figure>'
+    if media_type_enum is MediaType.AUDIO:
+        return f'<figure class="my-4"><audio controls src="{url}" title="{desc}" class="mt-1 w-full"></audio><figcaption class="text-center text-sm text-gray-600 mt-1">{desc}</figcaption></figure>'
+    if media_type_enum is MediaType.VIDEO:
+        return f'<figure class="my-4"><video controls src="{url}" title="{desc}" class="rounded-md mt-1 w-full"></video><figcaption class="text-center text-sm text-gray-600 mt-1">{desc}</figcaption></figure>'
+    return f'<a href="{url}" class="text-blue-600 underline" title="{desc}">{desc}</a>'
 
-def render_inline_kiro(line: str, styles: Dict) -> str:
+def render_inline_kiro(line: str, styles: StyleTable) -> str:
     """인라인 Kiro 요소를 렌더링합니다."""
     # 인라인 스타일 태그가 있는지 확인
     if "[" in line and "]" in line and not line.startswith("[") and not ("<>" in line):
@@ -480,7 +805,7 @@ def render_inline_kiro(line: str, styles: Dict) -> str:
             # 스타일 적용
             if style_name in styles:
                 style_result = process_style_content(style_name, content.strip(), styles)
-                result += f'<span class="{" ".join(style_result.class_list)}" {style_result.style_attr}>{style_result.rendered}</span>'
+                result += f'<span class="{style_result.class_str}" {style_result.style_attr}>{style_result.rendered}</span>'
             else:
                 result += f'[{style_name}]{apply_inline_styles(content)}'
                 
@@ -494,139 +819,44 @@ def render_inline_kiro(line: str, styles: Dict) -> str:
             
     return apply_inline_styles(line)
 
-def process_style_content(style_name: str, content: str, styles: Dict) -> StyleResult:
+def process_style_content(style_name: str, content: str, styles: StyleTable) -> StyleResult:
     """스타일 콘텐츠를 처리합니다."""
-    style_result = get_style_classes(style_name, styles)
-    class_list = []
-    md_structure = style_result["md_structure"]
+    style = styles[style_name]
     
     # 먼저 인라인 스타일 적용
     processed_content = render_inline_kiro(content, styles)
-    
-    if md_structure:
-        # 마크다운 구조 파싱
-        md_elements = []
-        current_element = ""
-        
-        # 마크다운 구조를 파싱하여 요소 목록 생성
-        for char in md_structure:
-            if char in ['#', '*', '_', '`', '-', '>', '|', '~', '=', '^', '[', ']', '(', ')']:
-                if current_element:
-                    md_elements.append(current_element)
-                current_element = char
-            else:
-                current_element += char
-        
-        if current_element:
-            md_elements.append(current_element)
-            
-        # 중복된 마크다운 요소 제거
-        md_elements = list(dict.fromkeys(md_elements))
-        
-        # 마크다운 요소를 우선순위에 따라 정렬
-        priority_order = {
-            '#': 1, '##': 2, '###': 3,  # 헤딩
-            '>': 4,  # 인용
-            '-': 5,  # 리스트
-            '|': 6,  # 단락
-            '**': 7, '_': 8,  # 강조
-            '`': 9,  # 코드
-            '~~': 10, '==': 11  # 기타
-        }
-        md_elements.sort(key=lambda x: priority_order.get(x, 999))
-        
-        # 마크다운 요소 적용 (순서 중요)
-        for element in md_elements:
-            if element.startswith('#'):
-                level = len(element)
-                if level == 1:
-                    processed_content = f"<h1 class='mt-6 mb-4 text-4xl font-bold'>{processed_content}</h1>"
-                elif level == 2:
-                    processed_content = f"<h2 class='mt-5 mb-3 text-3xl font-bold'>{processed_content}</h2>"
-                elif level == 3:
-                    processed_content = f"<h3 class='mt-4 mb-2 text-2xl font-bold'>{processed_content}</h3>"
-            elif element == '**':
-                # 기존 strong 태그가 있는지 확인하고 중복 방지
-                if '<strong' not in processed_content:
-                    processed_content = f"<strong class='font-bold'>{processed_content}</strong>"
-            elif element == '_':
-                # 기존 em 태그가 있는지 확인하고 중복 방지
-                if '<em' not in processed_content:
-                    processed_content = f"<em class='italic'>{processed_content}</em>"
-            elif element == '`':
-                # 기존 code 태그가 있는지 확인하고 중복 방지
-                if '<code' not in processed_content:
-                    processed_content = f"<code class='px-1 py-0.5 bg-gray-100 text-sm rounded font-jetbrains'>{processed_content}</code>"
-            elif element == '-':
-                processed_content = f"<li class='ml-6'>{processed_content}</li>"
-            elif element == '>':
-                processed_content = f"<blockquote class='my-4 border-l-4 pl-4 italic text-gray-600'>{processed_content}</blockquote>"
-            elif element == '|':
-                processed_content = f"<p class='mb-4'>{processed_content}</p>"
-            elif element == '~~':
-                processed_content = f"<del class='line-through'>{processed_content}</del>"
-            elif element == '==':
-                processed_content = f"<mark class='bg-yellow-200'>{processed_content}</mark>"
-        
-        # 리스트 항목인 경우 리스트 컨테이너 추가
-        if any(element == '-' for element in md_elements):
-            processed_content = f"<ul class='list-disc ml-6 mb-4'>{processed_content}</ul>"
-    
-    # 스타일 클래스 처리
-    style_elements = style_result["classes"].copy()
-    icon_prefix = ""
-    style_attr = ""
-    
-    # 색상 클래스 추출
-    color_classes = [cls for cls in style_elements if cls.startswith('text-')]
-    
-    for style in style_elements:
-        if style.startswith('+'):
-            icon = style[1:]
-            icon_prefix = f"{icon} "
-        elif style.startswith('#'):
-            color_attr = extract_color([style])
-            if color_attr and color_attr.startswith('text-'):
-                class_list.append(color_attr)
-            elif color_attr:
-                style_attr = color_attr
-        elif style in FONT_CONFIG:
-            font_class = get_font_class(style)
-            class_list.append(font_class)
-        elif style == "MonoplexKR-Regular":  # 특수 케이스 처리
-            class_list.append("font-monoplex")
-        else:
-            class_list.append(style)
-    
-    # 기본 마진 추가
-    if not any(cls.startswith("m") for cls in class_list):
-        class_list.append("mb-4")
-    
-    # 아이콘 접두사 추가
-    if icon_prefix:
-        processed_content = icon_prefix + processed_content
+
+    # 미리 계산한 감싸기 계획 적용 (아이콘 접두사 포함)
+    wrappers = style.wrappers
+    variant = 0
+    if len(wrappers) > 1:
+        variant = (('<strong' in processed_content)
+                   | ('<em' in processed_content) << 1
+                   | ('<code' in processed_content) << 2)
+    opening, closing = wrappers[variant]
+    processed_content = opening + processed_content + closing
     
     # 색상 클래스가 있는 경우 strong 태그에 색상 클래스 추가
-    if color_classes:
-        processed_content = re.sub(
-            r'<strong class=\'font-bold\'>(.*?)</strong>',
-            lambda m: f'<strong class=\'font-bold {" ".join(color_classes)}\'>{m.group(1)}</strong>',
+    if style.color_classes:
+        strong_open = f"<strong class='font-bold {' '.join(style.color_classes)}'>"
+        processed_content = _STRONG_RE.sub(
+            lambda m: f"{strong_open}{m.group(1)}</strong>",
             processed_content
         )
     
     return StyleResult(
-        class_list=class_list,
-        style_attr=style_attr,
+        class_str=style.class_str,
+        style_attr=style.style_attr,
         rendered=processed_content
     )
 
 def is_toggle_line(line: str) -> bool:
     """토글 라인인지 확인합니다."""
-    return bool(re.match(r"(#{1,6})?\s*(>{1,})\s*(.+)", line))
+    return bool(_TOGGLE_RE.match(line))
 
 def get_toggle_depth(line: str) -> int:
     """토글 라인의 깊이를 반환합니다."""
-    match = re.match(r"(#{1,6})?\s*(>{1,})\s*(.+)", line)
+    match = _TOGGLE_RE.match(line)
     return len(match.group(2)) if match else 0
 
 def has_deeper_toggle_next(lines: List[str], i: int, current_depth: int) -> bool:
@@ -639,7 +869,7 @@ def has_deeper_toggle_next(lines: List[str], i: int, current_depth: int) -> bool
             return next_depth > current_depth
     return False
 
-def process_toggle_content(lines: List[str], start_index: int, depth: int, styles: Dict) -> Tuple[List[str], int]:
+def process_toggle_content(lines: List[str], start_index: int, depth: int, styles: StyleTable) -> Tuple[List[str], int]:
     """토글 내부 콘텐츠를 재귀적으로 처리합니다."""
     content_html = []
     i = start_index
@@ -655,7 +885,7 @@ def process_toggle_content(lines: List[str], start_index: int, depth: int, style
             
             next_content, next_i = process_toggle_content(lines, i + 1, current_depth, styles)
             
-            match = re.match(r"(#{1,6})?\s*(>{1,})\s*(.+)", line)
+            match = _TOGGLE_RE.match(line)
             heading, toggle_markers, content = match.groups()
             rendered_content = render_inline_kiro(content, styles)
             
@@ -680,334 +910,648 @@ def process_toggle_content(lines: List[str], start_index: int, depth: int, style
     
     return content_html, i
 
-def render_kiro(text: str) -> Tuple[str, str]:
-    """Kiro 텍스트를 HTML로 렌더링합니다."""
-    lines = text.split("\n")
-    html = []
+class TokenType(Enum):
+    STYLE_START = "style_start"
+    STYLE_END = "style_end"
+    STYLE = "style"
+    CODE_FENCE = "code_fence"
+    CODE = "code"
+    TOGGLE = "toggle"
+    QUOTE = "quote"
+    STYLED = "styled"
+    MEDIA = "media"
+    CUSTOM_ITEM = "custom_item"
+    ORDERED_ITEM = "ordered_item"
+    BULLET_ITEM = "bullet_item"
+    HEADING = "heading"
+    RULE = "rule"
+    BLANK = "blank"
+    PARAGRAPH = "paragraph"
+
+class Token(NamedTuple):
+    """렉서가 한 줄을 분류한 결과입니다."""
+    type: TokenType
+    line: str
+    level: int = 0      # 토글 깊이, 헤딩 레벨, 리스트 들여쓰기, 코드 펜스 열림(1)/닫힘(0)
+    text: str = ""      # 렌더링할 본문
+    key: str = ""       # 토글 헤딩 기호, 커스텀 리스트 키, 미디어 타입
+    url: str = ""       # 미디어 URL
+
+# 블록 줄 분류 패턴: 기존 렌더러의 판별 순서대로 나열한 단일 패턴
+# 스타일 적용 줄([...] ... <>)은 줄 어디에 있어도 되므로 부분 문자열 검사로 판별합니다.
+_LINE_RE = re.compile(r"""
+    (?P<toggle>(?P<toggle_heading>\#{1,6})?\s*(?P<toggle_marks>>+)\s*(?P<toggle_text>.+))
+  | (?P<quote>\|\ (?P<quote_text>.*))
+  | (?P<media>@(?P<media_type>image|audio|video|link):\ *(?P<media_url>[^ ]+)\ *!\ *(?P<media_desc>.*))
+  | (?P<custom>-(?P<custom_key>[0-9A-Za-z.]+)\s+(?P<custom_text>.*))
+  | (?P<ordered>\d+\.\ (?P<ordered_text>.*))
+  | (?P<bullet>(?P<bullet_indent>\s*)-\ (?P<bullet_text>.*))
+  | (?P<dash>(?P<dash_marks>-+)\s+(?P<dash_text>.*))
+  | (?P<heading>(?P<heading_marks>\#{1,3})\ (?P<heading_text>.*))
+""", re.VERBOSE)
+
+def tokenize(lines: Iterable[str]) -> Iterator[Token]:
+    """각 줄을 한 번씩만 분류하여 토큰을 생성합니다."""
+    style_mode = False
+    in_code_block = False
+    match_line = _LINE_RE.match
+
+    for line in lines:
+        stripped = line.strip()
+
+        if style_mode:
+            if stripped == "<>":
+                style_mode = False
+                yield Token(TokenType.STYLE_END, line)
+            else:
+                yield Token(TokenType.STYLE_START if stripped == "<style>" else TokenType.STYLE, line)
+            continue
+        if stripped[:1] in ("<", "[", "`"):
+            if stripped == "<style>":
+                style_mode = True
+                yield Token(TokenType.STYLE_START, line)
+                continue
+            if stripped == "<>":
+                yield Token(TokenType.STYLE_END, line)
+                continue
+            if stripped[0] == "[" and "=" in stripped and "]" in stripped:
+                yield Token(TokenType.STYLE, line)
+                continue
+            if stripped.startswith("```"):
+                in_code_block = not in_code_block
+                yield Token(TokenType.CODE_FENCE, line, int(in_code_block))
+                continue
+        if in_code_block:
+            yield Token(TokenType.CODE, line)
+            continue
+
+        m = match_line(line)
+        kind = m.lastgroup if m else None
+        if kind == "toggle":
+            heading, marks, text = m.group("toggle_heading", "toggle_marks", "toggle_text")
+            yield Token(TokenType.TOGGLE, line, len(marks), text, heading or "")
+        elif kind == "quote":
+            yield Token(TokenType.QUOTE, line, 0, m.group("quote_text"))
+        elif "[" in line and "]" in line and "<>" in line:
+            yield Token(TokenType.STYLED, line)
+        elif kind is None:
+            if stripped == "---":
+                yield Token(TokenType.RULE, line)
+            elif not stripped:
+                yield Token(TokenType.BLANK, line)
+            else:
+                yield Token(TokenType.PARAGRAPH, line, 0, line)
+        elif kind == "media":
+            media_type, url, desc = m.group("media_type", "media_url", "media_desc")
+            yield Token(TokenType.MEDIA, line, 0, desc, media_type, url)
+        elif kind == "custom":
+            key, text = m.group("custom_key", "custom_text")
+            yield Token(TokenType.CUSTOM_ITEM, line, 0, text, key)
+        elif kind == "ordered":
+            yield Token(TokenType.ORDERED_ITEM, line, 0, m.group("ordered_text"))
+        elif kind == "bullet":
+            indent, text = m.group("bullet_indent", "bullet_text")
+            yield Token(TokenType.BULLET_ITEM, line, len(indent) // 2, text)
+        elif kind == "dash":
+            marks, text = m.group("dash_marks", "dash_text")
+            yield Token(TokenType.BULLET_ITEM, line, len(marks) - 1, text)
+        else:
+            marks, text = m.group("heading_marks", "heading_text")
+            yield Token(TokenType.HEADING, line, len(marks), text)
+
+def split_blocks(tokens: Iterable[Token]) -> Iterator[List[Token]]:
+    """토큰을 독립적으로 렌더링할 수 있는 최상위 블록으로 나눕니다.
+
+    블록은 렌더러의 상태(스타일 섹션, 코드 블록, 리스트, 인용, 토글)가 모두
+    닫힌 지점에서만 끊기므로, 블록별 렌더링 결과를 이어 붙이면 문서 전체를
+    한 번에 렌더링한 결과와 같습니다. 연속된 일반 단락 줄은 하나의 블록으로 묶습니다.
+    """
+    block = []
+    style_mode = False
     in_code_block = False
-    code_lines = []
     in_ul = False
     in_ol = False
     in_custom_list = False
     in_quote_block = False
-    toggle_stack = []
-    quote_lines = []
-    styles = parse_styles(lines)
-    style_mode = False
+    toggle_depths = []
+    prev_toggle = None
+
+    for token in tokens:
+        kind = token.type
+
+        # 이전 토글 줄이 토글 노드인지는 다음 줄을 보고 결정합니다.
+        if prev_toggle is not None:
+            if kind is TokenType.TOGGLE and token.level > prev_toggle.level:
+                toggle_depths.append(prev_toggle.level)
+            elif not (in_ul or in_ol or in_custom_list or in_quote_block or toggle_depths):
+                yield block
+                block = []
+            prev_toggle = None
+
+        block.append(token)
+
+        if kind is TokenType.STYLE_START:
+            style_mode = True
+        elif kind is TokenType.STYLE_END:
+            style_mode = False
+        elif kind is TokenType.CODE_FENCE:
+            in_code_block = bool(token.level)
+        elif kind is TokenType.STYLE or kind is TokenType.CODE:
+            pass
+        elif kind is TokenType.TOGGLE:
+            while toggle_depths and toggle_depths[-1] >= token.level:
+                toggle_depths.pop()
+            prev_toggle = token
+            continue
+        else:
+            toggle_depths.clear()
+            in_quote_block = kind is TokenType.QUOTE
+            if in_quote_block or kind is TokenType.STYLED or kind is TokenType.MEDIA:
+                pass
+            elif kind is TokenType.CUSTOM_ITEM:
+                in_custom_list = True
+            else:
+                in_custom_list = False
+                in_ol = kind is TokenType.ORDERED_ITEM
+                if not in_ol:
+                    in_ul = kind is TokenType.BULLET_ITEM
+                    if kind is TokenType.PARAGRAPH and not in_ul:
+                        continue
+
+        if style_mode or in_code_block or in_ul or in_ol or in_custom_list or in_quote_block \
+                or toggle_depths:
+            continue
+        yield block
+        block = []
 
-    print("🔍 Kiro 문서 렌더링 중...")
+    if block:
+        yield block
 
+class ParsedStyles(NamedTuple):
+    table: StyleTable
+    global_class: str
+    fingerprint: bytes  # 스타일 블록 원문의 해시
+
+def split_style_sections(text: str) -> Tuple[str, List[str]]:
+    """문서를 스타일 섹션 원문과 본문 줄 목록으로 나눕니다.
+
+    본문에는 섹션의 `<style>`과 `<>` 줄만 남기고 그 사이 선언 줄은 뺍니다.
+    섹션 경계는 정규식으로 찾으므로 나머지 줄을 파이썬에서 하나씩 훑지 않습니다.
+    """
+    match = _STYLE_OPEN_RE.search(text)
+    if match is None:
+        return "", text.split("\n")
+
+    sections = []
+    body = []
+    pos = 0
+    while match is not None:
+        close = _STYLE_CLOSE_RE.search(text, match.end())
+        if close is None:
+            # 닫히지 않은 섹션은 문서 끝까지 이어집니다
+            sections.append(text[match.start():])
+            body.append(text[pos:match.end()])
+            pos = len(text)
+            break
+        sections.append(text[match.start():close.end()])
+        body.append(text[pos:match.end() + 1])
+        pos = close.start()
+        match = _STYLE_OPEN_RE.search(text, close.end())
+    body.append(text[pos:])
+
+    return "\n".join(sections), "".join(body).split("\n")
+
+def build_global_class(styles: StyleTable) -> str:
+    """`!global` 스타일에서 문서 전체에 적용할 클래스 문자열을 만듭니다."""
     global_classes = []
     if "!global" in styles:
-        global_classes = styles["!global"]["classes"]
+        global_classes = styles["!global"].classes
 
     def is_font(cls): return cls in FONT_CONFIG
     def is_color(cls): return cls.startswith("#")
     def is_tailwind(cls): return not cls.startswith("+") and not is_font(cls) and not is_color(cls)
 
-    global_class_str = " ".join([
+    return " ".join([
         get_font_class(c) if is_font(c) else
         extract_color([c]).replace('style="', '').replace('"', '') if is_color(c) else
         c
         for c in global_classes if is_tailwind(c) or is_font(c) or is_color(c)
     ])
 
-    i = 0
-    while i < len(lines):
-        line = lines[i]
-        stripped = line.strip()
-        
-        if stripped == "<style>":
-            style_mode = True
-            i += 1
-            continue
-        elif stripped == "<>":
-            style_mode = False
-            i += 1
-            continue
-        elif style_mode:
-            i += 1
-            continue
-        elif stripped.startswith("[") and "=" in stripped and "]" in stripped:
-            i += 1
-            continue
+def load_styles(style_text: str) -> ParsedStyles:
+    """스타일 블록을 파싱합니다. 같은 스타일 블록은 캐시된 결과를 재사용합니다."""
+    fingerprint = hashlib.blake2b(style_text.encode("utf-8"), digest_size=16).digest()
+    parsed = _STYLE_CACHE.get(fingerprint)
+    if parsed is None:
+        table = parse_styles(style_text.split("\n"))
+        parsed = ParsedStyles(table, build_global_class(table), fingerprint)
+        _STYLE_CACHE.put(fingerprint, parsed)
+    return parsed
+
+def cache_info() -> Dict[str, Dict[str, int]]:
+    """블록 캐시와 스타일 캐시의 적중/실패 통계를 반환합니다."""
+    return {"blocks": _BLOCK_CACHE.info(), "styles": _STYLE_CACHE.info()}
+
+class Node:
+    """문서 트리 노드의 기반 클래스입니다."""
+    __slots__ = ()
+
+class Container(Node):
+    """자식 노드를 가지는 노드입니다."""
+    __slots__ = ("children",)
+
+    def __init__(self):
+        self.children: List[Node] = []
+
+class Document(Container):
+    """블록 하나의 최상위 노드입니다."""
+    __slots__ = ()
+
+class ListBlock(Container):
+    """글머리표(ul), 번호(ol), 커스텀 키(custom) 리스트입니다."""
+    __slots__ = ("kind",)
 
-        if stripped.startswith("```"):
-            in_code_block = not in_code_block
-            if not in_code_block:
-                code_html = "\n".join(code_lines)
-                html.append(f'<pre><code>{code_html}</code></pre>')
+    def __init__(self, kind: str):
+        super().__init__()
+        self.kind = kind
+
+class Toggle(Container):
+    """하위 토글을 가지는 토글 노드입니다."""
+    __slots__ = ("depth", "text")
+
+    def __init__(self, depth: int, text: str):
+        super().__init__()
+        self.depth = depth
+        self.text = text
+
+class Heading(Node):
+    __slots__ = ("level", "text")
+
+    def __init__(self, level: int, text: str):
+        self.level = level
+        self.text = text
+
+class ToggleLine(Node):
+    """하위 토글이 없는 토글 줄입니다. level이 0이면 단락으로 출력합니다."""
+    __slots__ = ("level", "text")
+
+    def __init__(self, level: int, text: str):
+        self.level = level
+        self.text = text
+
+class Paragraph(Node):
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+class Blank(Node):
+    __slots__ = ()
+
+class Rule(Node):
+    __slots__ = ()
+
+class ListItem(Node):
+    __slots__ = ("text", "indent")
+
+    def __init__(self, text: str, indent: int = 0):
+        self.text = text
+        self.indent = indent
+
+class CustomItem(Node):
+    __slots__ = ("key", "text")
+
+    def __init__(self, key: str, text: str):
+        self.key = key
+        self.text = text
+
+class Quote(Node):
+    __slots__ = ("lines",)
+
+    def __init__(self):
+        self.lines: List[str] = []
+
+class Media(Node):
+    __slots__ = ("media_type", "url", "desc")
+
+    def __init__(self, media_type: str, url: str, desc: str):
+        self.media_type = media_type
+        self.url = url
+        self.desc = desc
+
+class CodeBlock(Node):
+    __slots__ = ("lines",)
+
+    def __init__(self, lines: List[str]):
+        self.lines = lines
+
+class StyledLine(Node):
+    """`[스타일] ... <>` 스타일 적용 줄입니다."""
+    __slots__ = ("line",)
+
+    def __init__(self, line: str):
+        self.line = line
+
+def build_tree(tokens: List[Token]) -> Document:
+    """split_blocks로 나눈 블록 하나를 한 번에 훑어 문서 트리로 만듭니다.
+
+    인라인 내용은 원문 그대로 두고 HtmlSerializer가 스타일 테이블로 렌더링합니다.
+    """
+    root = Document()
+    stack: List[Container] = [root]  # 열린 컨테이너 (리스트 위에 토글이 쌓임)
+    code_lines = []
+    quote = None
+
+    for i, token in enumerate(tokens):
+        kind = token.type
+
+        if kind is TokenType.STYLE or kind is TokenType.STYLE_START or kind is TokenType.STYLE_END:
+            continue
+        if kind is TokenType.CODE_FENCE:
+            if not token.level:
+                stack[-1].children.append(CodeBlock(code_lines))
                 code_lines = []
-            i += 1
             continue
-        if in_code_block:
-            code_lines.append(line)
-            i += 1
+        if kind is TokenType.CODE:
+            code_lines.append(token.line)
             continue
 
-        toggle_match = is_toggle_line(line)
-        
-        if toggle_stack and not toggle_match:
-            while toggle_stack:
-                html.append('</div></details>')
-                toggle_stack.pop()
-        
-        if toggle_match:
-            match = re.match(r"(#{1,6})?\s*(>{1,})\s*(.+)", line)
-            heading, toggle_markers, content = match.groups()
-            current_depth = len(toggle_markers)
-            
-            is_toggle_node = has_deeper_toggle_next(lines, i, current_depth)
-            
-            while toggle_stack and toggle_stack[-1][0] >= current_depth:
-                html.append('</div></details>')
-                toggle_stack.pop()
-            
-            rendered_content = render_inline_kiro(content, styles)
-            
-            if is_toggle_node:
-                toggle_stack.append((current_depth, content))
-                
-                if heading:
-                    heading_level = len(heading)
-                    html.append(f'<details open>')
-                    html.append(f'<summary>{rendered_content}</summary>')
-                    html.append('<div>')
-                else:
-                    html.append(f'<details open>')
-                    html.append(f'<summary>{rendered_content}</summary>')
-                    html.append('<div>')
+        if kind is TokenType.TOGGLE:
+            current_depth = token.level
+            while isinstance(stack[-1], Toggle) and stack[-1].depth >= current_depth:
+                stack.pop()
+
+            next_token = tokens[i + 1] if i + 1 < len(tokens) else None
+            if (next_token is not None and next_token.type is TokenType.TOGGLE
+                    and next_token.level > current_depth):
+                toggle = Toggle(current_depth, token.text)
+                stack[-1].children.append(toggle)
+                stack.append(toggle)
             else:
-                if heading:
-                    heading_level = len(heading)
-                    html.append(f'<h{heading_level} class="text-{heading_level}xl font-bold mt-{heading_level + 2} mb-2">{rendered_content}</h{heading_level}>')
-                else:
-                    html.append(f'<p class="mb-4">{rendered_content}</p>')
-            
-            i += 1
+                stack[-1].children.append(ToggleLine(len(token.key), token.text))
             continue
 
-        if line.startswith("| "):
-            quote_lines.append(render_inline_kiro(line[2:], styles))
-            in_quote_block = True
-            i += 1
-            continue
-        elif in_quote_block and not line.startswith("| "):
-            quote_html = "<br>".join(quote_lines)
-            html.append(f'<blockquote>{quote_html}</blockquote>')
-            quote_lines = []
-            in_quote_block = False
-
-        if "[" in line and "]" in line:
-            if "<>" in line:
-                processed_html = process_styled_line(line, styles)
-                html.append(processed_html)
-                i += 1
-                continue
+        while isinstance(stack[-1], Toggle):
+            stack.pop()
 
-        media_html = render_media(line)
-        if media_html:
-            html.append(media_html)
-            i += 1
+        if kind is TokenType.QUOTE:
+            if quote is None:
+                quote = Quote()
+            quote.lines.append(token.text)
             continue
+        elif quote is not None:
+            stack[-1].children.append(quote)
+            quote = None
 
-        custom_list_match = re.match(r"^-([0-9A-Za-z\.]+)\s+(.*)", line)
-        if custom_list_match:
-            if not in_custom_list:
-                html.append('<ul class="custom-list pl-0 -ml-20">')
-                in_custom_list = True
-            list_key, content = custom_list_match.groups()
-            styled_key = f'<span class="inline-block w-[6em] text-right text-gray-500 font-mono">{list_key}</span>'
-            html.append(f'<li>{styled_key} {render_inline_kiro(content, styles)}</li>')
-            i += 1
-            continue
-        elif in_custom_list:
-            html.append('</ul>')
-            in_custom_list = False
-
-        if re.match(r"^\d+\. ", line):
-            if not in_ol:
-                html.append("<ol>")
-                in_ol = True
-            cleaned = re.sub(r'^\d+\. ', '', line)
-            html.append(f"<li>{render_inline_kiro(cleaned, styles)}</li>")
-            i += 1
+        if kind is TokenType.STYLED:
+            stack[-1].children.append(StyledLine(token.line))
             continue
-        elif in_ol:
-            html.append("</ol>")
-            in_ol = False
-
-        list_match = re.match(r"^(\s*)- (.*)", line)
-        if list_match:
-            indent, content = list_match.groups()
-            indent_level = len(indent) // 2
-            
-            if indent_level > 0:
-                if not in_ul:
-                    html.append("<ul>")
-                    in_ul = True
-                
-                content_html = render_inline_kiro(content, styles)
-                html.append(f"<li class=\"ml-{indent_level * 4}\">{content_html}</li>")
-            else:
-                if not in_ul:
-                    html.append("<ul>")
-                    in_ul = True
-                html.append(f"<li>{render_inline_kiro(content, styles)}</li>")
-            i += 1
+
+        if kind is TokenType.MEDIA:
+            stack[-1].children.append(Media(token.key, token.url, token.text))
             continue
-        
-        # 대시 중첩 리스트 처리 (-- 또는 --- 형식)
-        dash_list_match = re.match(r"^(-+)\s+(.*)", line)
-        if dash_list_match and not list_match:
-            dashes, content = dash_list_match.groups()
-            indent_level = len(dashes) - 1  # 첫 번째 대시를 뺀 개수가 들여쓰기 레벨
-            
-            if indent_level >= 0:
-                if not in_ul:
-                    html.append("<ul>")
-                    in_ul = True
-                
-                content_html = render_inline_kiro(content, styles)
-                if indent_level > 0:
-                    html.append(f"<li class=\"ml-{indent_level * 4}\">{content_html}</li>")
+
+        # 리스트는 ul 안에 ol, ol 안에 custom 순서로만 쌓입니다
+        for list_kind, item_type in (("custom", TokenType.CUSTOM_ITEM),
+                                     ("ol", TokenType.ORDERED_ITEM),
+                                     ("ul", TokenType.BULLET_ITEM)):
+            top = stack[-1]
+            in_list = isinstance(top, ListBlock) and top.kind == list_kind
+            if kind is item_type:
+                if not in_list:
+                    top = ListBlock(list_kind)
+                    stack[-1].children.append(top)
+                    stack.append(top)
+                if kind is TokenType.CUSTOM_ITEM:
+                    top.children.append(CustomItem(token.key, token.text))
                 else:
-                    html.append(f"<li>{content_html}</li>")
-                i += 1
-                continue
-            
-        elif in_ul:
-            html.append("</ul>")
-            in_ul = False
+                    top.children.append(ListItem(token.text, token.level))
+                break
+            elif in_list:
+                stack.pop()
+        else:
+            if kind is TokenType.HEADING:
+                stack[-1].children.append(Heading(token.level, token.text))
+            elif kind is TokenType.RULE:
+                stack[-1].children.append(Rule())
+            elif kind is TokenType.BLANK:
+                stack[-1].children.append(Blank())
+            else:
+                stack[-1].children.append(Paragraph(token.text))
 
-        if line.startswith("### "):
-            html.append(f'<h3>{render_inline_kiro(line[4:], styles)}</h3>')
-            i += 1
-            continue
-        elif line.startswith("## "):
-            html.append(f'<h2>{render_inline_kiro(line[3:], styles)}</h2>')
-            i += 1
-            continue
-        elif line.startswith("# "):
-            html.append(f'<h1>{render_inline_kiro(line[2:], styles)}</h1>')
-            i += 1
-            continue
+    if quote is not None:
+        stack[-1].children.append(quote)
+
+    return root
+
+class HtmlSerializer:
+    """문서 트리를 HTML로 직렬화합니다. 노드마다 visit_<클래스명> 메서드를 호출합니다."""
+
+    def __init__(self, styles: StyleTable):
+        self.styles = styles
+        self.html: List[str] = []
+
+    def serialize(self, node: Node) -> str:
+        self.html = []
+        self.visit(node)
+        return "\n".join(self.html)
+
+    def visit(self, node: Node) -> None:
+        getattr(self, "visit_" + type(node).__name__)(node)
+
+    def visit_children(self, node: Container) -> None:
+        for child in node.children:
+            self.visit(child)
+
+    def inline(self, text: str) -> str:
+        return render_inline_kiro(text, self.styles)
 
-        if stripped == "---":
-            html.append("<hr>")
-        elif not stripped:
-            html.append("<p></p>")
+    def visit_Document(self, node: Document) -> None:
+        self.visit_children(node)
+
+    def visit_ListBlock(self, node: ListBlock) -> None:
+        if node.kind == "custom":
+            self.html.append('<ul class="custom-list pl-0 -ml-20">')
         else:
-            html.append(f"<p>{render_inline_kiro(line, styles)}</p>")
+            self.html.append(f"<{node.kind}>")
+        self.visit_children(node)
+        self.html.append("</ol>" if node.kind == "ol" else "</ul>")
 
-        i += 1
+    def visit_Toggle(self, node: Toggle) -> None:
+        self.html.append('<details open>')
+        self.html.append(f'<summary>{self.inline(node.text)}</summary>')
+        self.html.append('<div>')
+        self.visit_children(node)
+        self.html.append('</div></details>')
 
-    if in_quote_block:
-        quote_html = "<br>".join(quote_lines)
-        html.append(f'<blockquote>{quote_html}</blockquote>')
-    if in_ul:
-        html.append("</ul>")
-    if in_ol:
-        html.append("</ol>")
-    if in_custom_list:
-        html.append("</ul>")
-        
-    while toggle_stack:
-        html.append('</div></details>')
-        toggle_stack.pop()
+    def visit_ToggleLine(self, node: ToggleLine) -> None:
+        level = node.level
+        if level:
+            self.html.append(f'<h{level} class="text-{level}xl font-bold mt-{level + 2} mb-2">{self.inline(node.text)}</h{level}>')
+        else:
+            self.html.append(f'<p class="mb-4">{self.inline(node.text)}</p>')
+
+    def visit_Heading(self, node: Heading) -> None:
+        self.html.append(f'<h{node.level}>{self.inline(node.text)}</h{node.level}>')
+
+    def visit_Paragraph(self, node: Paragraph) -> None:
+        self.html.append(f"<p>{self.inline(node.text)}</p>")
+
+    def visit_Blank(self, node: Blank) -> None:
+        self.html.append("<p></p>")
+
+    def visit_Rule(self, node: Rule) -> None:
+        self.html.append("<hr>")
+
+    def visit_ListItem(self, node: ListItem) -> None:
+        if node.indent > 0:
+            self.html.append(f"<li class=\"ml-{node.indent * 4}\">{self.inline(node.text)}</li>")
+        else:
+            self.html.append(f"<li>{self.inline(node.text)}</li>")
+
+    def visit_CustomItem(self, node: CustomItem) -> None:
+        styled_key = f'<span class="inline-block w-[6em] text-right text-gray-500 font-mono">{node.key}</span>'
+        self.html.append(f'<li>{styled_key} {self.inline(node.text)}</li>')
+
+    def visit_Quote(self, node: Quote) -> None:
+        quote_html = "<br>".join(self.inline(line) for line in node.lines)
+        self.html.append(f'<blockquote>{quote_html}</blockquote>')
+
+    def visit_Media(self, node: Media) -> None:
+        self.html.append(render_media_element(node.media_type, node.url, node.desc))
+
+    def visit_CodeBlock(self, node: CodeBlock) -> None:
+        code_html = "\n".join(node.lines)
+        self.html.append(f'<pre><code>{code_html}</code></pre>')
+
+    def visit_StyledLine(self, node: StyledLine) -> None:
+        self.html.append(process_styled_line(node.line, self.styles))
+
+def render_block(tokens: List[Token], styles: StyleTable) -> str:
+    """split_blocks로 나눈 블록 하나를 HTML로 렌더링합니다."""
+    return HtmlSerializer(styles).serialize(build_tree(tokens))
+
+def render_kiro_blocks(text: str, progress: Optional[Callable[[str], None]] = None) -> Tuple[List[Tuple[str, str]], str]:
+    """Kiro 텍스트를 블록 단위로 렌더링합니다.
+
+    (블록 ID, 블록 HTML) 목록과 전역 클래스 문자열을 반환합니다. 블록 ID는
+    블록 소스와 스타일 블록의 해시이므로 내용이 같은 블록은 같은 ID를 가집니다.
+    소스와 스타일 블록이 같은 블록은 캐시된 HTML을 재사용하므로
+    한 글자를 고치면 해당 블록만 다시 렌더링합니다. 스타일 블록의 파싱 결과도
+    캐시되므로 본문만 고치면 스타일을 다시 파싱하지 않습니다.
+
+    진행 메시지는 progress 콜백으로, 없으면 모듈 로거로 보냅니다. 전역 상태를
+    바꾸지 않으므로 여러 스레드에서 동시에 호출해도 안전합니다.
+    """
+    report = progress or logger.info
+    style_text, lines = split_style_sections(text)
+    parsed = load_styles(style_text)
+
+    report("🔍 Kiro 문서 렌더링 중...")
+    blocks = list(iter_blocks(lines, parsed))
+    report("✅ HTML 생성 완료")
+    return blocks, parsed.global_class
+
+def iter_blocks(lines: Iterable[str], parsed: ParsedStyles, cache: bool = True) -> Iterator[Tuple[str, str]]:
+    """본문 줄을 블록으로 나눠 (블록 ID, 블록 HTML)을 하나씩 생성합니다. 빈 블록은 건너뜁니다.
+
+    cache가 False이면 블록 캐시를 읽거나 채우지 않습니다.
+    """
+    for block in split_blocks(tokenize(lines)):
+        source = "\n".join(token.line for token in block)
+        key = hashlib.blake2b(source.encode("utf-8"), digest_size=16, key=parsed.fingerprint).hexdigest()
+        block_html = _BLOCK_CACHE.get(key) if cache else None
+        if block_html is None:
+            block_html = render_block(block, parsed.table)
+            if cache:
+                _BLOCK_CACHE.put(key, block_html)
+        if block_html:
+            yield key, block_html
+
+def iter_body_chunks(lines: Iterable[str], parsed: ParsedStyles, cache: bool = True) -> Iterator[str]:
+    """블록 HTML을 줄바꿈으로 구분된 조각으로 생성합니다."""
+    separator = ""
+    for _, block_html in iter_blocks(lines, parsed, cache):
+        yield separator + block_html
+        separator = "\n"
 
-    print("✅ HTML 생성 완료")
-    return "\n".join(html), global_class_str
+def render_kiro(text: str, progress: Optional[Callable[[str], None]] = None) -> Tuple[str, str]:
+    """Kiro 텍스트를 HTML로 렌더링합니다."""
+    blocks, global_class_str = render_kiro_blocks(text, progress)
+    return "\n".join(block_html for _, block_html in blocks), global_class_str
+
+def render_kiro_iter(text: str) -> Iterator[str]:
+    """Kiro 텍스트를 렌더링하며 블록이 완성될 때마다 본문 HTML 조각을 생성합니다.
+
+    조각을 모두 이어 붙이면 render_kiro의 본문과 같습니다.
+    """
+    style_text, lines = split_style_sections(text)
+    yield from iter_body_chunks(lines, load_styles(style_text))
+
+def render_document_iter(text: str) -> Iterator[str]:
+    """문서 셸까지 포함한 전체 HTML 문서를 조각 단위로 생성합니다."""
+    style_text, lines = split_style_sections(text)
+    parsed = load_styles(style_text)
+    yield from iter_document(parsed.global_class, iter_body_chunks(lines, parsed))
+
+def iter_file_lines(path: str) -> Iterator[str]:
+    """파일을 한 줄씩 읽어 read_text()를 줄바꿈으로 나눈 것과 같은 줄을 생성합니다."""
+    with open(path, encoding="utf-8") as f:
+        line = ""
+        for line in f:
+            yield line[:-1] if line.endswith("\n") else line
+        # 빈 파일이거나 줄바꿈으로 끝나면 split처럼 마지막 빈 줄이 있습니다
+        if not line or line.endswith("\n"):
+            yield ""
+
+def extract_style_text(lines: Iterable[str]) -> str:
+    """줄 목록에서 스타일 섹션만 골라 split_style_sections와 같은 원문을 만듭니다."""
+    sections = []
+    style_mode = False
+    for line in lines:
+        stripped = line.strip()
+        if style_mode:
+            sections.append(line)
+            if stripped == "<>":
+                style_mode = False
+        elif stripped == "<style>":
+            sections.append(line)
+            style_mode = True
+    return "\n".join(sections)
+
+def write_html(input_path: str, output_path: str, cache: bool = False,
+               shell: Optional[Tuple[str, str, str]] = None) -> None:
+    """Kiro 파일을 블록 단위로 렌더링하며 HTML 파일로 씁니다.
+
+    입력을 두 번 훑습니다. 첫 번째는 스타일 섹션만 모으고, 두 번째는 블록 단위로
+    렌더링해 바로 출력 파일에 씁니다. 따라서 메모리 사용량은 파일 전체가 아니라
+    가장 큰 블록에 비례합니다. cache가 True이면 블록 캐시를 사용합니다.
+    shell은 (전역 클래스 앞, 본문 앞, 본문 뒤) 조각이며 기본값은 DOCUMENT_SHELL입니다.
+    """
+    head, middle, tail = shell or (_SHELL_HEAD, _SHELL_MIDDLE, _SHELL_TAIL)
+    parsed = load_styles(extract_style_text(iter_file_lines(input_path)))
+
+    # 변환 도중 실패해도 기존 출력 파일이 깨지지 않도록 임시 파일에 씁니다
+    temp_path = f"{output_path}.tmp"
+    try:
+        with open(temp_path, "w", encoding="utf-8") as out:
+            out.write(head + parsed.global_class + middle)
+            for chunk in iter_body_chunks(iter_file_lines(input_path), parsed, cache):
+                out.write(chunk)
+            out.write(tail)
+        os.replace(temp_path, output_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
 
 def convert_file(input_path: str, output_path: str) -> None:
     """Kiro 파일을 HTML로 변환합니다."""
     print(f"📂 입력 파일: {input_path}")
     try:
-        text = Path(input_path).read_text(encoding="utf-8")
-        html_body, global_class_str = render_kiro(text)
-        
-        font_styles = generate_font_styles()
-
-        html = textwrap.dedent(f"""
-        <html>
-        <head>
-            <meta charset=\"UTF-8\">
-            <title>Kiro Rendered Document</title>
-            <script src=\"https://cdn.tailwindcss.com?plugins=typography\"></script>
-            {font_styles["google_fonts"]}
-            {font_styles["custom_fonts_links"]}
-            {font_styles["custom_fonts"]}
-            {font_styles["tailwind_config"]}
-            <style type="text/css">
-                /* 커스텀 리스트 스타일 */
-                .prose :where(ul.custom-list):not(:where([class~="not-prose"] *)) {{
-                    list-style-type: none;
-                    padding-left: 0em;
-                }}
-                .prose :where(ul.custom-list li):not(:where([class~="not-prose"] *)) {{
-                    display: flex;
-                    align-items: baseline;
-                    margin-top: 0.5em;
-                    margin-bottom: 0.5em;
-                }}
-                .prose :where(ul.custom-list li span):not(:where([class~="not-prose"] *)) {{
-                    font-family: 'JetBrains Mono', monospace;
-                    color: #6b7280;
-                    margin-right: 0.5em;
-                    min-width: 3em;
-                    display: inline-block;
-                    text-align: right;
-                }}
-
-                /* 토글 스타일 개선 */
-                details {{
-                    position: relative;
-                    margin: 0em 0;
-                    padding-left: 1em;
-                }}
-
-                details::before {{
-                    content: none;
-                }}
-
-                details > div {{
-                    position: relative;
-                    margin-left: 1em;
-                    padding-left: 1em;
-                }}
-
-                details > div::before {{
-                    content: '';
-                    position: absolute;
-                    left: -1em;
-                    top: 0;
-                    bottom: 0;
-                    width: 2px;
-                    background-color: #e5e7eb;
-                    border-radius: 1px;
-                }}
-
-                details summary {{
-                    margin-bottom: 0.5em;
-                }}
-
-                /* 헤딩 마진 조정 */
-                .prose :where(h1, h2, h3, h4, h5, h6):not(:where([class~="not-prose"] *)) {{
-                    margin-bottom: 0.3em;
-                }}
-            </style>
-        </head>
-        <body class=\"min-h-screen bg-gray-50 text-gray-800 font-sans\">
-            <div class=\"max-w-3xl mx-auto py-10 px-4 sm:px-6\">
-                <article class="prose prose-slate max-w-none {global_class_str}">
-                    {html_body}
-                </article>
-            </div>
-        </body>
-        </html>
-        """)
-
-        Path(output_path).write_text(html, encoding="utf-8")
+        print("🔍 Kiro 문서 렌더링 중...")
+        write_html(input_path, output_path)
+        print("✅ HTML 생성 완료")
+
         print(f"💾 저장 완료: {output_path}")
     except Exception as e:
         import traceback
@@ -1015,7 +1559,171 @@ def convert_file(input_path: str, output_path: str) -> None:
         traceback.print_exc()
         sys.exit(1)
 
-def process_styled_line(line: str, styles: Dict) -> str:
+def file_hash(path: Path) -> str:
+    """파일 내용의 SHA-256 해시를 반환합니다."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def renderer_hash() -> str:
+    """렌더러 소스의 해시를 반환합니다. 렌더러가 바뀌면 모든 문서를 다시 변환합니다."""
+    return file_hash(Path(__file__))
+
+def find_kiro_files(root: Path) -> List[Path]:
+    """디렉터리 아래의 모든 .kiro 파일을 상대 경로로 반환합니다."""
+    return sorted(path.relative_to(root) for path in root.rglob("*.kiro") if path.is_file())
+
+def load_manifest(path: Path) -> Dict:
+    """변환 매니페스트를 읽습니다. 없거나 깨졌으면 빈 매니페스트를 반환합니다."""
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(path: Path, manifest: Dict) -> None:
+    """변환 매니페스트를 원자적으로 저장합니다."""
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding="utf-8")
+    os.replace(temp_path, path)
+
+def _convert_timed(input_path: str, output_path: str) -> float:
+    """배치 작업 프로세스에서 파일 하나를 변환하고 걸린 시간(초)을 반환합니다."""
+    start = time.perf_counter()
+    write_html(input_path, output_path)
+    return time.perf_counter() - start
+
+def convert_directory(input_dir: str, output_dir: str, workers: Optional[int] = None) -> Dict[str, int]:
+    """디렉터리 트리의 .kiro 파일을 모든 코어에서 병렬로 HTML로 변환합니다.
+
+    출력 디렉터리의 매니페스트에 원본 해시를 기록해 두고, 다음 실행에서는 원본과
+    렌더러가 바뀌지 않은 파일을 건너뜁니다. 변환/건너뜀/실패 개수를 반환합니다.
+    """
+    input_root = Path(input_dir)
+    output_root = Path(output_dir)
+    output_root.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_root / MANIFEST_NAME
+
+    manifest = load_manifest(manifest_path)
+    renderer = renderer_hash()
+    previous = manifest.get("files", {}) if manifest.get("renderer") == renderer else {}
+
+    files = {}
+    pending = []
+    skipped = 0
+    for relative in find_kiro_files(input_root):
+        key = relative.as_posix()
+        source_hash = file_hash(input_root / relative)
+        output_path = output_root / relative.with_suffix(".html")
+        files[key] = source_hash
+        if previous.get(key) == source_hash and output_path.exists():
+            skipped += 1
+            continue
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        pending.append((key, input_root / relative, output_path))
+
+    print(f"📂 {len(files)}개 파일 중 {len(pending)}개 변환, {skipped}개 건너뜀")
+
+    failed = 0
+    total_bytes = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(_convert_timed, str(input_path), str(output_path)): (key, input_path)
+            for key, input_path, output_path in pending
+        }
+        for future in as_completed(futures):
+            key, input_path = futures[future]
+            try:
+                elapsed = future.result()
+            except Exception as e:
+                failed += 1
+                del files[key]  # 다음 실행에서 다시 시도
+                print(f"❌ {key}: {e}")
+                continue
+            total_bytes += input_path.stat().st_size
+            print(f"⏱️ {key}: {elapsed * 1000:.1f} ms")
+    elapsed = time.perf_counter() - start
+
+    save_manifest(manifest_path, {"renderer": renderer, "files": files})
+
+    converted = len(pending) - failed
+    if converted:
+        print(f"⚡ {converted}개 파일을 {elapsed:.2f}초에 변환 "
+              f"({converted / elapsed:.1f} 파일/s, {total_bytes / elapsed / 1e6:.2f} MB/s)")
+    return {"converted": converted, "skipped": skipped, "failed": failed}
+
+def watch_directory(input_dir: str, output_dir: str,
+                    interval: float = WATCH_INTERVAL, debounce: float = WATCH_DEBOUNCE) -> None:
+    """디렉터리를 주기적으로 확인해 바뀐 .kiro 파일만 다시 변환합니다.
+
+    렌더러를 메모리에 띄워 둔 채 블록/스타일 캐시를 재사용하므로 고친 블록만 다시
+    렌더링합니다. 수정 시각이나 크기가 바뀐 파일은 debounce초 동안 더 바뀌지 않을 때
+    변환하며, 내용 해시가 매니페스트와 같으면 건너뜁니다. 매니페스트는 --batch와 공유합니다.
+    """
+    input_root = Path(input_dir)
+    output_root = Path(output_dir)
+    output_root.mkdir(parents=True, exist_ok=True)
+    manifest_path = output_root / MANIFEST_NAME
+
+    manifest = load_manifest(manifest_path)
+    renderer = renderer_hash()
+    files = manifest.get("files", {}) if manifest.get("renderer") == renderer else {}
+
+    seen = {}  # 파일 -> (수정 시각, 크기)
+    changed_at = {}  # 파일 -> 마지막으로 바뀐 것을 발견한 시각
+
+    print(f"👀 {input_root} 감시 중... (Ctrl+C로 종료)")
+    try:
+        while True:
+            now = time.monotonic()
+            current = {}
+            for relative in find_kiro_files(input_root):
+                key = relative.as_posix()
+                try:
+                    stat = (input_root / relative).stat()
+                except OSError:
+                    continue
+                current[key] = (stat.st_mtime_ns, stat.st_size)
+                if seen.get(key) != current[key]:
+                    changed_at[key] = now
+            seen = current
+
+            dirty = False
+            for key in [key for key, changed in changed_at.items() if now - changed >= debounce]:
+                del changed_at[key]
+                if key not in current:
+                    continue
+                input_path = input_root / key
+                output_path = (output_root / key).with_suffix(".html")
+                try:
+                    source_hash = file_hash(input_path)
+                    if files.get(key) == source_hash and output_path.exists():
+                        continue
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
+                    start = time.perf_counter()
+                    write_html(str(input_path), str(output_path), cache=True)
+                except Exception as e:
+                    print(f"❌ {key}: {e}")
+                    dirty = files.pop(key, None) is not None or dirty
+                    continue
+                files[key] = source_hash
+                dirty = True
+                print(f"🔄 {key}: {(time.perf_counter() - start) * 1000:.1f} ms")
+
+            # 삭제된 파일은 매니페스트에서 제거
+            for key in [key for key in files if key not in current]:
+                del files[key]
+                dirty = True
+
+            if dirty:
+                save_manifest(manifest_path, {"renderer": renderer, "files": files})
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("👋 감시를 종료합니다")
+
+def process_styled_line(line: str, styles: StyleTable) -> str:
     """스타일 태그가 포함된 줄을 처리합니다."""
     if "<>" not in line:
         return render_inline_kiro(line, styles)
@@ -1033,7 +1741,7 @@ def process_styled_line(line: str, styles: Dict) -> str:
                 if style_name in styles:
                     result = process_style_content(style_name, content, styles)
                     processed_parts.append(
-                        f'<span class="{" ".join(result.class_list)}" {result.style_attr}>{result.rendered}</span>'
+                        f'<span class="{result.class_str}" {result.style_attr}>{result.rendered}</span>'
                     )
                 else:
                     content_rendered = render_inline_kiro(content, styles)
@@ -1059,7 +1767,7 @@ def process_styled_line(line: str, styles: Dict) -> str:
                 result = process_style_content(style_name, content, styles)
                 tail_rendered = render_inline_kiro(tail.strip(), styles) if tail else ""
                 
-                return f'<div class="{" ".join(result.class_list)}" {result.style_attr}>{result.rendered} {tail_rendered}</div>'
+                return f'<div class="{result.class_str}" {result.style_attr}>{result.rendered} {tail_rendered}</div>'
             else:
                 content_rendered = render_inline_kiro(content, styles)
                 tail_rendered = render_inline_kiro(tail.strip(), styles) if tail else ""
@@ -1068,8 +1776,20 @@ def process_styled_line(line: str, styles: Dict) -> str:
     return render_inline_kiro(line, styles)
 
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
+    # Windows 환경에서 UTF-8 출력 강제 설정
+    sys.stdout.reconfigure(encoding='utf-8')
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
+    if len(sys.argv) in (4, 5) and sys.argv[1] == "--batch":
+        result = convert_directory(sys.argv[2], sys.argv[3], int(sys.argv[4]) if len(sys.argv) == 5 else None)
+        if result["failed"]:
+            sys.exit(1)
+    elif len(sys.argv) == 4 and sys.argv[1] == "--watch":
+        watch_directory(sys.argv[2], sys.argv[3])
+    elif len(sys.argv) != 3:
         print("📌 사용법: python kiro_renderer.py input.kiro output.html")
+        print("📌 배치 변환: python kiro_renderer.py --batch 입력폴더 출력폴더 [작업 프로세스 수]")
+        print("📌 감시 모드: python kiro_renderer.py --watch 입력폴더 출력폴더")
     else:
         try:
             convert_file(sys.argv[1], sys.argv[2])
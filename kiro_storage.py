@@ -0,0 +1,980 @@
+"""Kiro 문서 저장소
+
+사용자 폴더의 파일 트리 색인을 관리합니다. 처음 조회할 때 폴더를 한 번 훑어 색인을 만들고,
+이후에는 파일 저장/삭제와 폴더 생성이 바뀐 경로만 갱신합니다. 폴더마다 정렬된 목록을
+캐시하므로 변경이 없으면 트리 조회에 정렬 없이 세대 파일 stat 한 번만 필요합니다.
+구조가 바뀔 때마다 사용자 폴더의 세대 파일이 커지므로, 다른 프로세스가 바꾼 트리는 다시 훑습니다.
+폴더 하나의 하위 항목을 깊이와 커서로 나눠 조회할 수도 있습니다.
+문서는 임시 파일을 거쳐 원자적으로 쓰며, 잦은 자동 저장은 쓰기 지연 버퍼로 합칠 수 있습니다.
+
+저장소는 Storage 인터페이스 뒤에 있으며, 사용자별 폴더(FileStorage)와 SQLite 데이터베이스
+(SQLiteStorage) 구현이 있습니다. 기존 kiro_files를 데이터베이스로 옮기려면:
+
+사용법: python kiro_storage.py 원본폴더(kiro_files) 데이터베이스파일
+"""
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+import bisect
+import logging
+import os
+import queue
+import shutil
+import sqlite3
+import stat
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import kiro_renderer
+
+logger = logging.getLogger(__name__)
+
+# 색인을 메모리에 유지할 사용자 폴더 수
+TREE_INDEX_SIZE = 1024
+
+# 사용자 폴더의 구조가 바뀔 때마다 한 바이트씩 덧붙이는 파일. 크기가 트리의 세대 번호입니다
+GENERATION_FILE = ".kiro-generation"
+
+# FileStorage가 저장소 폴더에 잡는 잠금 파일 (쓰기 지연 버퍼를 켜면 배타, 아니면 공유 잠금)
+WRITE_BEHIND_LOCK = ".kiro-write-behind.lock"
+
+# 지우는 폴더를 잠시 옮겨 두는 이름의 접두사. 색인은 이 이름의 폴더를 건너뜁니다
+TRASH_PREFIX = ".kiro-deleted-"
+
+# 정렬 순서: 폴더가 파일보다 먼저
+_FOLDER, _FILE = 0, 1
+
+def encode_cursor(entry: Tuple[int, str]) -> str:
+    """페이지의 마지막 항목을 다음 페이지 커서로 만듭니다."""
+    return f"{entry[0]}:{entry[1]}"
+
+def decode_cursor(cursor: str) -> Tuple[int, str]:
+    """커서를 (종류, 이름)으로 되돌립니다. 잘못된 커서면 ValueError를 냅니다."""
+    kind, sep, name = cursor.partition(":")
+    if not sep or kind not in ("0", "1"):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return int(kind), name
+
+class _Folder:
+    """색인의 폴더 노드입니다."""
+    __slots__ = ("folders", "files", "listing", "entries", "generation")
+
+    def __init__(self):
+        self.folders: Dict[str, "_Folder"] = {}
+        self.files: Set[str] = set()
+        # 정렬된 목록 캐시 (하위가 바뀌면 None)
+        self.listing: Optional[List[dict]] = None
+        # 바로 아래 항목의 정렬된 (종류, 이름) 캐시 (바로 아래가 바뀌면 None)
+        self.entries: Optional[List[Tuple[int, str]]] = None
+        # 사용자 폴더 노드에서만 사용: 이 색인이 반영하는 세대 파일 크기
+        self.generation = 0
+
+    def child_count(self) -> int:
+        return len(self.folders) + len(self.files)
+
+    def sorted_entries(self) -> List[Tuple[int, str]]:
+        if self.entries is None:
+            self.entries = sorted([(_FOLDER, name) for name in self.folders] +
+                                  [(_FILE, name) for name in self.files])
+        return self.entries
+
+    def page(self, folder_id: str, depth: int, cursor: Optional[str], limit: int) -> dict:
+        """하위 항목을 커서 다음부터 limit개 반환합니다. depth가 1보다 크면 하위 폴더도 펼칩니다."""
+        entries = self.sorted_entries()
+        start = bisect.bisect_right(entries, decode_cursor(cursor)) if cursor else 0
+        chunk = entries[start:start + limit]
+        children = []
+        for kind, name in chunk:
+            item_id = f"{folder_id}/{name}" if folder_id else name
+            if kind == _FOLDER:
+                folder = self.folders[name]
+                item = {"id": item_id, "name": name, "type": "folder", "child_count": folder.child_count()}
+                if depth > 1:
+                    item.update(folder.page(item_id, depth - 1, None, limit))
+            else:
+                item = {"id": item_id, "name": name, "type": "file"}
+            children.append(item)
+        return {
+            "children": children,
+            "next_cursor": encode_cursor(chunk[-1]) if start + limit < len(entries) else None
+        }
+
+    def clear_listings(self) -> None:
+        """이 폴더와 모든 하위 폴더의 목록 캐시를 비웁니다."""
+        self.listing = None
+        for folder in self.folders.values():
+            folder.clear_listings()
+
+    def build_listing(self, folder_id: Optional[str]) -> List[dict]:
+        """/api/files 형식의 정렬된 목록을 반환합니다. 바뀐 폴더만 다시 만듭니다."""
+        if self.listing is None:
+            items = []
+            for name in sorted(self.folders):
+                item_id = f"{folder_id}/{name}" if folder_id else name
+                items.append({
+                    "id": item_id,
+                    "name": name,
+                    "type": "folder",
+                    "children": self.folders[name].build_listing(item_id)
+                })
+            for name in sorted(self.files):
+                items.append({
+                    "id": f"{folder_id}/{name}" if folder_id else name,
+                    "name": name,
+                    "type": "file"
+                })
+            self.listing = items
+        return self.listing
+
+def scan_folder(path: Path) -> _Folder:
+    """폴더를 훑어 색인 노드를 만듭니다. .kiro 파일과 모든 하위 폴더를 담습니다."""
+    folder = _Folder()
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith(TRASH_PREFIX):
+                continue
+            if entry.is_dir():
+                folder.folders[entry.name] = scan_folder(Path(entry.path))
+            elif entry.name.endswith(".kiro"):
+                folder.files.add(entry.name)
+    return folder
+
+def read_generation(root: Path) -> int:
+    """사용자 폴더 트리의 세대 번호(세대 파일 크기)를 반환합니다."""
+    try:
+        return os.stat(root / GENERATION_FILE).st_size
+    except FileNotFoundError:
+        return 0
+
+def bump_generation(root: Path) -> int:
+    """세대 파일에 한 바이트를 덧붙이고 덧붙인 뒤의 크기를 반환합니다.
+
+    O_APPEND 쓰기는 프로세스 사이에서도 겹치지 않으므로, 반환값에서 1을 뺀 값이
+    직전 세대입니다.
+    """
+    fd = os.open(root / GENERATION_FILE, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, b"\n")
+        return os.lseek(fd, 0, os.SEEK_CUR)
+    finally:
+        os.close(fd)
+
+def write_text_atomic(path: Path, content: str) -> None:
+    """임시 파일에 쓰고 디스크에 반영한 뒤 이름을 바꿉니다. 쓰는 도중 중단되어도 원래 파일이 온전히 남습니다.
+
+    임시 파일 이름은 쓸 때마다 달라서, 여러 프로세스가 같은 파일을 동시에 저장해도 서로의
+    임시 파일을 건드리지 않습니다(마지막으로 이름을 바꾼 쪽이 남습니다).
+    """
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = 0o644
+    out = tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=path.parent,
+                                      prefix=f".{path.name}.", suffix=".tmp", delete=False)
+    temp_path = Path(out.name)
+    try:
+        with out:
+            out.write(content)
+            out.flush()
+            os.fsync(out.fileno())
+        # NamedTemporaryFile은 0600으로 만들므로 원래 파일의 권한을 따릅니다
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    finally:
+        if temp_path.exists():
+            temp_path.unlink()
+
+def lock_file(path: Path, exclusive: bool):
+    """잠금 파일을 열어 잠그고 파일 객체를 반환합니다. 맞지 않는 잠금이 있으면 OSError를 냅니다.
+
+    공유 잠금끼리는 함께 잡을 수 있고, 배타 잠금은 다른 어떤 잠금과도 함께 잡을 수 없습니다.
+    Windows에는 공유 잠금이 없어 배타 잠금만 겁니다. 잠금은 파일 객체를 닫거나 프로세스가 끝나면 풀립니다.
+    """
+    handle = open(path, "a+")
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle.fileno(), (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+        elif exclusive:
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        handle.close()
+        raise
+    return handle
+
+def split_path(relative: str) -> Optional[Tuple[str, ...]]:
+    """사용자 폴더 기준 상대 경로를 이름 목록으로 나눕니다. 색인으로 따라갈 수 없는 경로면 None입니다."""
+    path = Path(relative)
+    if path.is_absolute() or not path.parts or any(part in (".", "..") for part in path.parts):
+        return None
+    return path.parts
+
+class FileTreeIndex:
+    """사용자 폴더별 파일 트리 색인입니다. 여러 스레드에서 함께 사용할 수 있습니다.
+
+    구조를 바꾸는 모든 갱신은 세대 파일을 키우고, 조회 때 세대가 색인과 다르면
+    (다른 프로세스가 바꿨으면) 폴더를 다시 훑습니다.
+    """
+
+    def __init__(self, max_users: int = TREE_INDEX_SIZE):
+        self._roots = kiro_renderer.LRUCache(max_users)
+        self._lock = threading.Lock()
+
+    def _root(self, root: Path) -> _Folder:
+        """사용자 폴더의 최신 색인을 반환합니다. 잠금을 잡은 채로 부릅니다.
+
+        폴더를 훑는 동안에는 잠금을 풀어, 큰 폴더 하나가 다른 사용자의 조회와 갱신을 막지 않게 합니다.
+        """
+        generation = read_generation(root)
+        folder = self._roots.get(str(root))
+        if folder is not None and folder.generation == generation:
+            return folder
+        self._lock.release()
+        try:
+            scanned = scan_folder(root)
+        finally:
+            self._lock.acquire()
+        # 훑기 전에 읽은 세대를 달아, 훑는 도중의 변경은 다음 조회에서 다시 훑게 합니다.
+        # 그 사이 다른 스레드가 더 새 색인을 넣었으면 그것을 씁니다.
+        scanned.generation = generation
+        folder = self._roots.get(str(root))
+        if folder is None or folder.generation < generation:
+            folder = scanned
+            self._roots.put(str(root), folder)
+        return folder
+
+    def _changed(self, root: Path) -> None:
+        """구조 변경을 세대 파일에 기록합니다. 잠금을 잡은 채로 부릅니다.
+
+        그 사이 다른 프로세스가 바꾼 것이 없으면 색인의 세대만 올려 이어서 갱신하고,
+        있으면 색인을 버립니다.
+        """
+        generation = bump_generation(root)
+        folder = self._roots.get(str(root))
+        if folder is not None:
+            if folder.generation == generation - 1:
+                folder.generation = generation
+            else:
+                self._roots.pop(str(root))
+
+    def listing(self, root: Path) -> List[dict]:
+        """사용자 폴더의 전체 트리를 /api/files 형식으로 반환합니다."""
+        with self._lock:
+            return self._root(root).build_listing(None)
+
+    def page(self, root: Path, relative: str, depth: int = 1,
+             cursor: Optional[str] = None, limit: int = 200) -> Optional[dict]:
+        """폴더 하나의 하위 항목 한 페이지를 반환합니다. 폴더가 없으면 None입니다."""
+        parts = split_path(relative) if relative else ()
+        if parts is None:
+            return None
+        with self._lock:
+            folder = self._root(root)
+            for name in parts:
+                folder = folder.folders.get(name)
+                if folder is None:
+                    return None
+            result = {"id": "/".join(parts), "child_count": folder.child_count()}
+            result.update(folder.page(result["id"], depth, cursor, limit))
+            return result
+
+    def _parent(self, root: Path, parts: Tuple[str, ...], create: bool) -> Optional[_Folder]:
+        """경로의 상위 폴더 노드를 찾고, 지나가는 폴더의 목록 캐시를 비웁니다."""
+        folder = self._roots.get(str(root))
+        if folder is None:
+            return None
+        folder.listing = None
+        for name in parts[:-1]:
+            child = folder.folders.get(name)
+            if child is None:
+                if not create:
+                    return None
+                child = folder.folders[name] = _Folder()
+                folder.entries = None
+            folder = child
+            folder.listing = None
+        return folder
+
+    def add_file(self, root: Path, relative: str) -> None:
+        """새로 저장된 파일(과 새로 만들어진 상위 폴더)을 색인에 반영합니다."""
+        parts = split_path(relative)
+        with self._lock:
+            self._changed(root)
+            if parts is None:
+                self._roots.pop(str(root))
+                return
+            folder = self._parent(root, parts, create=True)
+            if folder is not None and parts[-1].endswith(".kiro") and parts[-1] not in folder.files:
+                folder.files.add(parts[-1])
+                folder.entries = None
+
+    def add_folder(self, root: Path, relative: str) -> None:
+        """만들어진 폴더(와 상위 폴더)를 색인에 반영합니다."""
+        parts = split_path(relative)
+        with self._lock:
+            self._changed(root)
+            if parts is None:
+                self._roots.pop(str(root))
+                return
+            folder = self._parent(root, parts, create=True)
+            if folder is not None and parts[-1] not in folder.folders:
+                folder.folders[parts[-1]] = _Folder()
+                folder.entries = None
+
+    def remove(self, root: Path, relative: str) -> None:
+        """삭제된 파일이나 폴더를 색인에서 뺍니다."""
+        parts = split_path(relative)
+        with self._lock:
+            self._changed(root)
+            if parts is None:
+                self._roots.pop(str(root))
+                return
+            folder = self._parent(root, parts, create=False)
+            if folder is not None:
+                folder.folders.pop(parts[-1], None)
+                folder.files.discard(parts[-1])
+                folder.entries = None
+
+    def move(self, root: Path, old: str, new: str) -> None:
+        """이름이 바뀌거나 옮겨진 파일/폴더를 색인에 반영합니다."""
+        old_parts, new_parts = split_path(old), split_path(new)
+        with self._lock:
+            self._changed(root)
+            if old_parts is None or new_parts is None:
+                self._roots.pop(str(root))
+                return
+            source = self._parent(root, old_parts, create=False)
+            if source is None:
+                return
+            node = source.folders.pop(old_parts[-1], None)
+            is_file = old_parts[-1] in source.files
+            source.files.discard(old_parts[-1])
+            source.entries = None
+            target = self._parent(root, new_parts, create=True)
+            if node is not None:
+                node.clear_listings()  # 캐시된 목록의 id가 옛 경로를 담고 있음
+                target.folders[new_parts[-1]] = node
+            elif is_file and new_parts[-1].endswith(".kiro"):
+                target.files.add(new_parts[-1])
+            target.entries = None
+
+    def invalidate(self, root: Path) -> None:
+        """사용자 폴더의 색인을 버립니다. 다음 조회에서 다시 훑습니다."""
+        with self._lock:
+            self._roots.pop(str(root))
+
+@dataclass
+class _PendingWrite:
+    content: str
+    first: float    # 디스크에 쓰지 않은 첫 저장 시각
+    last: float     # 마지막 저장 시각
+    version: int = 0
+
+class WriteBehindBuffer:
+    """문서 저장을 메모리에 모았다가 디스크에 씁니다. 여러 스레드에서 함께 사용할 수 있습니다.
+
+    같은 파일의 연속 저장은 마지막 내용 한 번의 쓰기로 합쳐집니다. 파일은 마지막 저장 후
+    idle초 동안 저장이 없거나 처음 저장된 지 interval초가 지나면 쓰고, close()에서 모두 씁니다.
+    대기 중인 내용은 이 프로세스에만 보이므로, 같은 파일을 다른 프로세스가 함께 쓰면 안 됩니다.
+    """
+
+    def __init__(self, interval: float = 5.0, idle: float = 1.0):
+        self.interval = interval
+        self.idle = idle
+        self._pending: Dict[Path, _PendingWrite] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        # 디스크 쓰기 중에는 삭제가 기다리도록 해, 지운 파일이 다시 생기지 않게 합니다
+        self._io_lock = threading.Lock()
+        self._closed = False
+        self.writes = 0
+        self.flushes = 0
+        self.errors = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._thread = threading.Thread(target=self._run, name="kiro-write-behind", daemon=True)
+        self._thread.start()
+
+    def write(self, path: Path, content: str) -> bool:
+        """이미 있는 파일의 새 내용을 버퍼에 저장하고 True를 반환합니다.
+
+        파일이 없으면 저장하지 않고 False를 반환하므로 호출한 쪽이 바로 씁니다. 존재 확인을
+        rename/remove와 같은 잠금 안에서 하므로, 옮겨지거나 지워진 옛 경로에 쓰지 않습니다.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._pending.get(path)
+            if entry is None:
+                if not path.is_file():
+                    return False
+                self._pending[path] = _PendingWrite(content, now, now)
+            else:
+                entry.content = content
+                entry.last = now
+                entry.version += 1
+            self.writes += 1
+            self._wakeup.notify()
+        return True
+
+    def read(self, path: Path) -> Optional[str]:
+        """아직 디스크에 쓰지 않은 내용을 반환합니다. 없으면 None입니다."""
+        with self._lock:
+            entry = self._pending.get(path)
+            return entry.content if entry is not None else None
+
+    def _under(self, path: Path) -> List[Path]:
+        """대기 중인 경로 가운데 path와 그 아래 경로를 반환합니다. 잠금을 잡은 채로 부릅니다."""
+        return [key for key in self._pending if key == path or path in key.parents]
+
+    def rename(self, old: Path, new: Path) -> None:
+        """디스크에서 old를 new로 옮기고, 그 아래의 쓰지 않은 내용도 새 경로로 옮깁니다.
+
+        옮기는 동안 저장과 디스크 쓰기는 기다리므로, 대기 중인 쓰기가 옛 경로를 되살리지 않습니다.
+        """
+        with self._io_lock, self._lock:
+            old.rename(new)
+            for key in self._under(old):
+                self._pending[new / key.relative_to(old)] = self._pending.pop(key)
+
+    def remove(self, path: Path) -> None:
+        """파일이나 폴더(와 그 아래 전체)를 지우고 쓰지 않은 내용을 버립니다.
+
+        폴더는 잠금 안에서 TRASH_PREFIX 이름으로 옮기기만 하고, 실제 삭제는 잠금 밖에서 합니다.
+        """
+        with self._io_lock, self._lock:
+            for key in self._under(path):
+                del self._pending[key]
+            if not path.is_dir():
+                path.unlink()
+                return
+            trash = path.with_name(f"{TRASH_PREFIX}{os.urandom(8).hex()}")
+            path.rename(trash)
+        shutil.rmtree(trash)
+
+    def _due(self, now: float) -> Tuple[List[Path], Optional[float]]:
+        """지금 쓸 경로 목록과, 없으면 다음 쓰기까지 기다릴 시간을 반환합니다."""
+        due = []
+        wait = None
+        for path, entry in self._pending.items():
+            deadline = min(entry.last + self.idle, entry.first + self.interval)
+            if deadline <= now:
+                due.append(path)
+            elif wait is None or deadline - now < wait:
+                wait = deadline - now
+        return due, wait
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                due, wait = self._due(time.monotonic())
+                if not due:
+                    self._wakeup.wait(wait)
+                    continue
+            self._flush(due)
+
+    def _flush(self, paths: List[Path]) -> None:
+        with self._io_lock:
+            for path in paths:
+                with self._lock:
+                    entry = self._pending.get(path)
+                    if entry is None:
+                        continue
+                    content, version, first = entry.content, entry.version, entry.first
+                try:
+                    write_text_atomic(path, content)
+                except OSError:
+                    logger.exception("쓰기 지연 버퍼 저장 실패: %s", path)
+                    with self._lock:
+                        self.errors += 1
+                        if path in self._pending:
+                            self._pending[path].last = time.monotonic()  # idle초 뒤 다시 시도
+                    continue
+                latency = time.monotonic() - first
+                with self._lock:
+                    # 쓰는 동안 새 내용이 들어왔으면 남겨 두고 다음에 씁니다
+                    entry = self._pending.get(path)
+                    if entry is not None:
+                        if entry.version == version:
+                            del self._pending[path]
+                        else:
+                            entry.first = time.monotonic()
+                    self.flushes += 1
+                    self._latency_total += latency
+                    self._latency_max = max(self._latency_max, latency)
+
+    def flush(self, path: Optional[Path] = None) -> None:
+        """쓰지 않은 내용을 디스크에 씁니다. path를 주면 그 경로와 그 아래 파일만 씁니다."""
+        with self._lock:
+            paths = list(self._pending) if path is None else self._under(path)
+        self._flush(paths)
+
+    def close(self) -> None:
+        """쓰기 스레드를 멈추고 남은 내용을 모두 씁니다."""
+        with self._lock:
+            self._closed = True
+            self._wakeup.notify()
+        self._thread.join()
+        self.flush()
+
+    def stats(self) -> Dict[str, float]:
+        """저장/디스크 쓰기 횟수와 저장부터 디스크 반영까지 걸린 시간을 반환합니다."""
+        with self._lock:
+            return {
+                "writes": self.writes,
+                "flushes": self.flushes,
+                "pending": len(self._pending),
+                "errors": self.errors,
+                "flush_latency_avg_ms": self._latency_total / self.flushes * 1000 if self.flushes else 0.0,
+                "flush_latency_max_ms": self._latency_max * 1000
+            }
+
+def normalize_path(relative: str) -> str:
+    """사용자 폴더 기준 상대 경로를 '/'로 이은 형태로 바꿉니다. 밖으로 나가는 경로면 ValueError를 냅니다."""
+    parts = split_path(relative)
+    if parts is None:
+        raise ValueError(f"Invalid path: {relative}")
+    return "/".join(parts)
+
+class Storage(ABC):
+    """문서 저장소 인터페이스입니다.
+
+    경로는 normalize_path를 거친 사용자 기준 상대 경로입니다. 없는 경로는 FileNotFoundError,
+    이미 있는 대상은 FileExistsError, 폴더를 문서로 읽거나 쓰면 IsADirectoryError를 냅니다.
+    목록은 FileTreeIndex와 같은 형식이며, 폴더와 .kiro 문서만 담습니다.
+    """
+
+    @abstractmethod
+    def has_user(self, user_id: str) -> bool:
+        """사용자 공간이 이미 있는지 반환합니다. 아무것도 만들지 않습니다."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def ensure_user(self, user_id: str) -> bool:
+        """사용자 공간을 만들고, 새로 만들었으면 True를 반환합니다. 동시에 불러도 한 번만 True입니다."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def read(self, user_id: str, path: str) -> str:
+        raise NotImplementedError
+
+    @abstractmethod
+    def write(self, user_id: str, path: str, content: str, mtime: Optional[float] = None) -> None:
+        """문서를 저장합니다. 없는 상위 폴더는 만듭니다.
+
+        mtime(유닉스 시각)을 주면 지금 대신 그 시각을 수정 시각으로 남깁니다. 가져오기에서 씁니다.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def create_folder(self, user_id: str, path: str) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, user_id: str, path: str) -> None:
+        """문서나 폴더(와 그 안의 모든 항목)를 지웁니다."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def move(self, user_id: str, old: str, new: str) -> None:
+        """문서나 폴더의 이름을 바꾸거나 옮깁니다. 폴더를 자기 하위로 옮기면 ValueError를 냅니다."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def listing(self, user_id: str) -> List[dict]:
+        """전체 트리를 반환합니다."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def page(self, user_id: str, path: str, depth: int = 1,
+             cursor: Optional[str] = None, limit: int = 200) -> Optional[dict]:
+        """폴더 하나의 하위 항목 한 페이지를 반환합니다. 폴더가 없으면 None입니다."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def stats(self) -> dict:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+class FileStorage(Storage):
+    """사용자마다 폴더 하나, 문서마다 파일 하나로 저장합니다.
+
+    쓰기 지연 버퍼를 쓰면 저장소 폴더를 배타적으로, 쓰지 않으면 공유로 잠급니다. 따라서 버퍼를 쓰는
+    프로세스는 같은 폴더를 쓰는 다른 프로세스와 함께 실행되지 못합니다.
+    """
+
+    def __init__(self, root: Path, write_behind: Optional[WriteBehindBuffer] = None):
+        self.root = root
+        self.index = FileTreeIndex()
+        self.buffer = write_behind
+        root.mkdir(parents=True, exist_ok=True)
+        try:
+            self._lock_file = lock_file(root / WRITE_BEHIND_LOCK, exclusive=write_behind is not None)
+        except OSError:
+            if write_behind is not None:
+                write_behind.close()
+            raise RuntimeError(
+                f"{root} is in use by another process with a conflicting write-behind setting; "
+                f"the write-behind buffer only works with a single process serving the storage directory")
+
+    def user_dir(self, user_id: str) -> Path:
+        return self.root / user_id
+
+    def has_user(self, user_id: str) -> bool:
+        return self.user_dir(user_id).is_dir()
+
+    def ensure_user(self, user_id: str) -> bool:
+        try:
+            self.user_dir(user_id).mkdir(parents=True)
+        except FileExistsError:
+            return False
+        return True
+
+    def read(self, user_id: str, path: str) -> str:
+        full_path = self.user_dir(user_id) / path
+        if self.buffer is not None:
+            content = self.buffer.read(full_path)
+            if content is not None:
+                return content
+        return full_path.read_text(encoding="utf-8")
+
+    def write(self, user_id: str, path: str, content: str, mtime: Optional[float] = None) -> None:
+        full_path = self.user_dir(user_id) / path
+        # 이미 있는 파일의 저장은 버퍼에 모읍니다. 내용만 바뀐 저장은 트리를 바꾸지 않습니다.
+        # 수정 시각을 정한 저장은 버퍼를 거치지 않습니다
+        if self.buffer is not None and mtime is None and self.buffer.write(full_path, content):
+            return
+        # 새 파일은 바로 써서, 디렉터리 트리(와 색인의 재탐색)가 저장된 내용과 맞게 합니다
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        existed = full_path.exists()
+        write_text_atomic(full_path, content)
+        if mtime is not None:
+            os.utime(full_path, (mtime, mtime))
+        if not existed:
+            self.index.add_file(self.user_dir(user_id), path)
+
+    def create_folder(self, user_id: str, path: str) -> None:
+        (self.user_dir(user_id) / path).mkdir(parents=True, exist_ok=True)
+        self.index.add_folder(self.user_dir(user_id), path)
+
+    def delete(self, user_id: str, path: str) -> None:
+        full_path = self.user_dir(user_id) / path
+        if self.buffer is not None:
+            # 버퍼의 내용도 함께 버려, 대기 중인 쓰기가 지운 파일을 되살리지 않게 합니다
+            self.buffer.remove(full_path)
+        elif full_path.is_dir():
+            shutil.rmtree(full_path)
+        else:
+            full_path.unlink()
+        self.index.remove(self.user_dir(user_id), path)
+
+    def move(self, user_id: str, old: str, new: str) -> None:
+        if new.startswith(old + "/"):
+            raise ValueError(f"Cannot move {old} into itself")
+        source = self.user_dir(user_id) / old
+        target = self.user_dir(user_id) / new
+        if not source.exists():
+            raise FileNotFoundError(old)
+        if target.exists() and not target.samefile(source):
+            raise FileExistsError(new)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if self.buffer is not None:
+            # 쓰지 않은 내용은 디스크에 쓰지 않고 새 경로로 옮겨 갑니다
+            self.buffer.rename(source, target)
+        else:
+            source.rename(target)
+        self.index.move(self.user_dir(user_id), old, new)
+
+    def listing(self, user_id: str) -> List[dict]:
+        return self.index.listing(self.user_dir(user_id))
+
+    def page(self, user_id: str, path: str, depth: int = 1,
+             cursor: Optional[str] = None, limit: int = 200) -> Optional[dict]:
+        return self.index.page(self.user_dir(user_id), path, depth, cursor, limit)
+
+    def stats(self) -> dict:
+        return {
+            "backend": "files",
+            "write_behind": self.buffer.stats() if self.buffer is not None else None
+        }
+
+    def close(self) -> None:
+        if self.buffer is not None:
+            self.buffer.close()
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    user_id TEXT NOT NULL,
+    path TEXT NOT NULL,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    kind INTEGER NOT NULL,
+    content TEXT,
+    size INTEGER NOT NULL DEFAULT 0,
+    mtime REAL NOT NULL,
+    PRIMARY KEY (user_id, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS nodes_parent ON nodes (user_id, parent, kind, name);
+"""
+
+# SQLiteStorage가 열어 둘 유휴 연결 수의 상한
+SQLITE_POOL_SIZE = 8
+
+def _parent_of(path: str) -> str:
+    return path.rpartition("/")[0]
+
+def _listed(table: str) -> str:
+    """목록에 나오는 노드(폴더와 .kiro 문서)만 고르는 조건입니다. FileTreeIndex와 같은 기준입니다."""
+    return f"({table}.kind = {_FOLDER} OR substr({table}.name, -5) = '.kiro')"
+
+class SQLiteStorage(Storage):
+    """모든 사용자의 문서와 폴더 구조를 SQLite(WAL 모드) 데이터베이스 하나에 저장합니다.
+
+    nodes 테이블에 (사용자, 경로)를 기본 키로, (사용자, 상위 경로, 종류, 이름)을 색인으로 둡니다.
+    폴더 목록은 색인 범위 조회, 폴더 삭제/이동은 경로 접두사 범위에 대한 쿼리 하나로 처리합니다.
+    연결은 호출마다 풀에서 빌려 쓰고, 유휴 연결은 pool_size개까지만 열어 둡니다.
+    """
+
+    def __init__(self, db_path: Path, pool_size: int = SQLITE_POOL_SIZE):
+        self.db_path = db_path
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(pool_size)
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._closed = False
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._schema_lock:
+            if not self._schema_ready:
+                conn.executescript(_SQLITE_SCHEMA)
+                self._schema_ready = True
+        return conn
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """풀에서 연결을 빌려 씁니다. 돌려받은 연결은 pool_size개까지만 남기고 나머지는 닫습니다."""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._open()
+        try:
+            yield conn
+        finally:
+            try:
+                if self._closed:
+                    raise queue.Full
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def _kind(self, conn: sqlite3.Connection, user_id: str, path: str) -> Optional[int]:
+        row = conn.execute("SELECT kind FROM nodes WHERE user_id = ? AND path = ?", (user_id, path)).fetchone()
+        return row[0] if row else None
+
+    def _ensure_folders(self, conn: sqlite3.Connection, user_id: str, path: str, now: float) -> None:
+        """경로와 그 상위 폴더가 없으면 만듭니다."""
+        parts = path.split("/") if path else []
+        for i in range(1, len(parts) + 1):
+            folder = "/".join(parts[:i])
+            conn.execute(
+                "INSERT OR IGNORE INTO nodes (user_id, path, parent, name, kind, mtime) VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, folder, _parent_of(folder), parts[i - 1], _FOLDER, now))
+            if self._kind(conn, user_id, folder) != _FOLDER:
+                raise NotADirectoryError(folder)
+
+    def has_user(self, user_id: str) -> bool:
+        with self._connect() as conn:
+            return conn.execute("SELECT 1 FROM users WHERE user_id = ?", (user_id,)).fetchone() is not None
+
+    def ensure_user(self, user_id: str) -> bool:
+        with self._connect() as conn, conn:
+            cursor = conn.execute("INSERT OR IGNORE INTO users (user_id, created) VALUES (?, ?)", (user_id, time.time()))
+            return cursor.rowcount == 1
+
+    def read(self, user_id: str, path: str) -> str:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT kind, content FROM nodes WHERE user_id = ? AND path = ?", (user_id, path)).fetchone()
+        if row is None:
+            raise FileNotFoundError(path)
+        if row[0] == _FOLDER:
+            raise IsADirectoryError(path)
+        return row[1]
+
+    def write(self, user_id: str, path: str, content: str, mtime: Optional[float] = None) -> None:
+        now = time.time()
+        with self._connect() as conn, conn:
+            self._ensure_folders(conn, user_id, _parent_of(path), now)
+            cursor = conn.execute(
+                "INSERT INTO nodes (user_id, path, parent, name, kind, content, size, mtime) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (user_id, path) DO UPDATE SET "
+                "content = excluded.content, size = excluded.size, mtime = excluded.mtime "
+                "WHERE kind = excluded.kind",
+                (user_id, path, _parent_of(path), path.rpartition("/")[2], _FILE,
+                 content, len(content.encode("utf-8")), now if mtime is None else mtime))
+            if cursor.rowcount == 0:
+                raise IsADirectoryError(path)
+
+    def create_folder(self, user_id: str, path: str) -> None:
+        with self._connect() as conn, conn:
+            self._ensure_folders(conn, user_id, path, time.time())
+
+    def delete(self, user_id: str, path: str) -> None:
+        with self._connect() as conn, conn:
+            cursor = conn.execute(
+                "DELETE FROM nodes WHERE user_id = ? AND (path = ? OR (path >= ? AND path < ?))",
+                (user_id, path, path + "/", path + "0"))
+            if cursor.rowcount == 0:
+                raise FileNotFoundError(path)
+
+    def move(self, user_id: str, old: str, new: str) -> None:
+        if new == old:
+            return
+        if new.startswith(old + "/"):
+            raise ValueError(f"Cannot move {old} into itself")
+        now = time.time()
+        with self._connect() as conn, conn:
+            kind = self._kind(conn, user_id, old)
+            if kind is None:
+                raise FileNotFoundError(old)
+            if self._kind(conn, user_id, new) is not None:
+                raise FileExistsError(new)
+            self._ensure_folders(conn, user_id, _parent_of(new), now)
+            conn.execute(
+                "UPDATE nodes SET path = ?, parent = ?, name = ?, mtime = ? WHERE user_id = ? AND path = ?",
+                (new, _parent_of(new), new.rpartition("/")[2], now, user_id, old))
+            if kind == _FOLDER:
+                # 하위 항목의 경로와 상위 경로에서 옛 접두사를 새 접두사로 바꿉니다
+                start = len(old) + 1
+                conn.execute(
+                    "UPDATE nodes SET path = ? || substr(path, ?), parent = ? || substr(parent, ?) "
+                    "WHERE user_id = ? AND path >= ? AND path < ?",
+                    (new, start, new, start, user_id, old + "/", old + "0"))
+
+    def listing(self, user_id: str) -> List[dict]:
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT path, parent, name, kind FROM nodes WHERE user_id = ? AND {_listed('nodes')} "
+                "ORDER BY kind, name", (user_id,)).fetchall()
+        children: Dict[str, List[dict]] = {}
+        for path, parent, name, kind in rows:
+            item = {"id": path, "name": name, "type": "folder" if kind == _FOLDER else "file"}
+            if kind == _FOLDER:
+                item["children"] = children.setdefault(path, [])
+            children.setdefault(parent, []).append(item)
+        return children.get("", [])
+
+    def _page(self, conn: sqlite3.Connection, user_id: str, folder_id: str, depth: int,
+              cursor: Optional[str], limit: int) -> dict:
+        after = decode_cursor(cursor) if cursor else (-1, "")
+        rows = conn.execute(
+            "SELECT n.kind, n.name, n.path, "
+            f"(SELECT COUNT(*) FROM nodes c WHERE c.user_id = n.user_id AND c.parent = n.path AND {_listed('c')}) "
+            f"FROM nodes n WHERE n.user_id = ? AND n.parent = ? AND {_listed('n')} AND (n.kind, n.name) > (?, ?) "
+            "ORDER BY n.kind, n.name LIMIT ?",
+            (user_id, folder_id, after[0], after[1], limit + 1)).fetchall()
+        children = []
+        for kind, name, path, child_count in rows[:limit]:
+            if kind == _FOLDER:
+                item = {"id": path, "name": name, "type": "folder", "child_count": child_count}
+                if depth > 1:
+                    item.update(self._page(conn, user_id, path, depth - 1, None, limit))
+            else:
+                item = {"id": path, "name": name, "type": "file"}
+            children.append(item)
+        return {
+            "children": children,
+            "next_cursor": encode_cursor(tuple(rows[limit - 1][:2])) if len(rows) > limit else None
+        }
+
+    def page(self, user_id: str, path: str, depth: int = 1,
+             cursor: Optional[str] = None, limit: int = 200) -> Optional[dict]:
+        with self._connect() as conn:
+            if path and self._kind(conn, user_id, path) != _FOLDER:
+                return None
+            child_count = conn.execute(
+                f"SELECT COUNT(*) FROM nodes WHERE user_id = ? AND parent = ? AND {_listed('nodes')}",
+                (user_id, path)).fetchone()[0]
+            result = {"id": path, "child_count": child_count}
+            result.update(self._page(conn, user_id, path, depth, cursor, limit))
+            return result
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+            documents, size = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM nodes WHERE kind = ?", (_FILE,)).fetchone()
+        return {"backend": "sqlite", "users": users, "documents": documents, "bytes": size}
+
+    def close(self) -> None:
+        """유휴 연결을 닫습니다. 사용 중인 연결은 돌려받을 때 닫습니다."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+def migrate_directory(source: Path, storage: Storage) -> Dict[str, int]:
+    """사용자 폴더들(예: kiro_files/<사용자 ID>)을 저장소로 가져오고 사용자/폴더/문서 개수를 반환합니다.
+
+    문서의 수정 시각은 원본 파일의 수정 시각을 그대로 씁니다.
+    """
+    counts = {"users": 0, "folders": 0, "documents": 0}
+    for user_dir in sorted(path for path in source.iterdir() if path.is_dir()):
+        user_id = user_dir.name
+        storage.ensure_user(user_id)
+        counts["users"] += 1
+        for folder, dirnames, filenames in os.walk(user_dir):
+            # 지우다 남은 폴더는 가져오지 않습니다
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith(TRASH_PREFIX))
+            relative = Path(folder).relative_to(user_dir)
+            for name in dirnames:
+                storage.create_folder(user_id, (relative / name).as_posix())
+                counts["folders"] += 1
+            for name in sorted(filenames):
+                if name.endswith(".kiro"):
+                    path = relative / name
+                    content = (user_dir / path).read_text(encoding="utf-8")
+                    mtime = (user_dir / path).stat().st_mtime
+                    storage.write(user_id, path.as_posix(), content, mtime)
+                    counts["documents"] += 1
+        logger.info(f"📁 {user_id}")
+    return counts
+
+if __name__ == "__main__":
+    # Windows 환경에서 UTF-8 출력 강제 설정
+    sys.stdout.reconfigure(encoding='utf-8')
+    logging.basicConfig(level=logging.INFO, format="%(message)s", stream=sys.stdout)
+
+    if len(sys.argv) != 3:
+        print("📌 사용법: python kiro_storage.py 원본폴더(kiro_files) 데이터베이스파일")
+    else:
+        storage = SQLiteStorage(Path(sys.argv[2]))
+        start = time.perf_counter()
+        result = migrate_directory(Path(sys.argv[1]), storage)
+        storage.close()
+        print(f"🎉 사용자 {result['users']}명, 폴더 {result['folders']}개, "
+              f"문서 {result['documents']}개를 {time.perf_counter() - start:.2f}초에 가져옴: {sys.argv[2]}")
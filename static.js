@@ -24,11 +24,30 @@ document.addEventListener('DOMContentLoaded', () => {
     let lastRenderedHTML = '';
     let currentFile = null;
     let lastSavedContent = '';
+    let lastSavedVersion = null; // Server version of lastSavedContent, for patch saves
     let autoSaveTimer = null;
     let currentMode = 'edit'; // 'edit' or 'view'
     let modalAction = null; // 'file' or 'folder'
     let modalParentPath = '';
     let draggedItem = null; // For drag and drop
+    const expandedFolders = new Set(); // Folder paths open in the sidebar
+    const FOLDER_PAGE_SIZE = 200;
+    
+    // Delta render state: the server holds a copy of the document per tab
+    const renderTab = Math.random().toString(36).slice(2) + Date.now().toString(36);
+    let renderVersion = 0;
+    let renderedText = null;
+    let renderShell = null; // Promise of the shared document shell from /api/shell
+    let renderBlocks = new Map();
+    let renderQueue = Promise.resolve();
+    let viewRender = { etag: null, html: '' }; // Last document streamed into the view iframe
+    
+    // Live preview channel: edits go up as small POSTs, renders come back over SSE
+    let previewSource = null;
+    let previewQueue = Promise.resolve();
+    let previewRenderedVersion = 0;
+    let previewWaiters = [];
+    const PREVIEW_RETRY_MS = 60000; // Before reopening a refused preview stream
     
     // Event listeners for mode buttons
     if (editModeBtn) {
@@ -143,36 +162,9 @@ document.addEventListener('DOMContentLoaded', () => {
         
         try {
             // First check if a file/folder with the same name already exists
-            const fileStructure = await loadFileStructure();
             const itemPath = modalParentPath ? `${modalParentPath}/${name}` : name;
             
-            // Function to check duplicates in the file structure
-            const checkDuplicate = (items, path) => {
-                if (!items) return false;
-                
-                // Direct check for root level items
-                if (items.some(item => item.id === path)) {
-                    return true;
-                }
-                
-                // Check in folders for nested paths
-                if (path.includes('/')) {
-                    const pathParts = path.split('/');
-                    const parentFolderName = pathParts[0];
-                    const parentFolder = items.find(item => 
-                        item.type === 'folder' && item.name === parentFolderName
-                    );
-                    
-                    if (parentFolder && parentFolder.children) {
-                        const remainingPath = pathParts.slice(1).join('/');
-                        return checkDuplicate(parentFolder.children, remainingPath);
-                    }
-                }
-                
-                return false;
-            };
-            
-            if (checkDuplicate(fileStructure, itemPath)) {
+            if (await itemExists(itemPath)) {
                 showToast(`이미 같은 이름의 ${modalAction === 'file' ? '파일' : '폴더'}이 존재합니다`, true);
                 return;
             }
@@ -230,37 +222,22 @@ document.addEventListener('DOMContentLoaded', () => {
     // Move file to another folder
     async function moveFile(sourcePath, targetFolder) {
         try {
-            // First, load the file content
-            const response = await fetch(`/api/file?path=${encodeURIComponent(sourcePath)}`);
-            if (!response.ok) throw new Error('Failed to load file');
-            
-            const data = await response.json();
-            const content = data.content;
-            
-            // Create the new file path
             const fileName = sourcePath.split('/').pop();
             const newPath = targetFolder === '' ? fileName : `${targetFolder}/${fileName}`;
             
-            // Create the file in the new location
-            const createResponse = await fetch('/api/file', {
+            // Move the file on the server in one request
+            const response = await fetch('/api/file/rename', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
-                    path: newPath,
-                    content: content
+                    old_path: sourcePath,
+                    new_path: newPath
                 })
             });
             
-            if (!createResponse.ok) throw new Error('Failed to move file');
-            
-            // Delete the old file
-            const deleteResponse = await fetch(`/api/file?path=${encodeURIComponent(sourcePath)}`, {
-                method: 'DELETE'
-            });
-            
-            if (!deleteResponse.ok) throw new Error('Failed to delete original file');
+            if (!response.ok) throw new Error('Failed to move file');
             
             // Update UI if the current file was moved
             if (currentFile === sourcePath) {
@@ -409,59 +386,307 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 1000);
     }
     
-    // Simple render function
-    function renderKiro(forViewMode = false) {
-        if (!editor || !editor.value) {
-            console.log('No content to render');
-            return Promise.resolve();  // Return a resolved promise for chaining
+    // Compute a single {offset, delete, insert} edit between two texts
+    function diffText(oldText, newText) {
+        const minLength = Math.min(oldText.length, newText.length);
+        let start = 0;
+        while (start < minLength && oldText.charCodeAt(start) === newText.charCodeAt(start)) {
+            start++;
+        }
+        let oldEnd = oldText.length;
+        let newEnd = newText.length;
+        while (oldEnd > start && newEnd > start &&
+               oldText.charCodeAt(oldEnd - 1) === newText.charCodeAt(newEnd - 1)) {
+            oldEnd--;
+            newEnd--;
         }
+        // Never split a surrogate pair
+        if (start > 0 && isHighSurrogate(oldText.charCodeAt(start - 1))) {
+            start--;
+        }
+        if (oldEnd < oldText.length && isLowSurrogate(oldText.charCodeAt(oldEnd))) {
+            oldEnd++;
+            newEnd++;
+        }
+        return {
+            offset: start,
+            delete: oldEnd - start,
+            insert: newText.slice(start, newEnd)
+        };
+    }
     
-        console.log('Rendering Kiro content:', editor.value.length, 'characters');
+    function isHighSurrogate(code) {
+        return code >= 0xD800 && code <= 0xDBFF;
+    }
+    
+    function isLowSurrogate(code) {
+        return code >= 0xDC00 && code <= 0xDFFF;
+    }
+    
+    // Load the document shell once; the browser revalidates it by ETag
+    function loadShell() {
+        if (!renderShell) {
+            renderShell = fetch('/api/shell')
+                .then(response => {
+                    if (!response.ok) throw new Error('Failed to load document shell');
+                    return response.text();
+                })
+                .catch(error => {
+                    renderShell = null;
+                    throw error;
+                });
+        }
+        return renderShell;
+    }
     
-        return fetch('/api/render', {
+    // Place a rendered body and its global classes into the document shell
+    function buildDocument(shell, body, globalClass) {
+        return shell
+            .replace('<!--kiro:global-class-->', () => globalClass)
+            .replace('<!--kiro:body-->', () => body);
+    }
+    
+    // Send edits (or the full content when out of sync) to the delta render API
+    async function requestDeltaRender(content) {
+        const shell = await loadShell();
+        const payload = { tab: renderTab };
+        if (renderedText === null) {
+            payload.content = content;
+        } else {
+            payload.version = renderVersion;
+            payload.edits = content === renderedText ? [] : [diffText(renderedText, content)];
+        }
+        
+        const response = await fetch('/api/render/delta', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({
-                content: editor.value
-            })
-        })
-        .then(response => {
-            console.log('Render API response status:', response.status);
-            return response.json();
-        })
-        .then(data => {
-            console.log('Render data received:', data);
+            body: JSON.stringify(payload)
+        });
+        console.log('Render API response status:', response.status);
+        
+        if (response.status === 409 && payload.content === undefined) {
+            // Out of step with the server copy: resync with the full content
+            renderedText = null;
+            return requestDeltaRender(content);
+        }
+        
+        const data = await response.json();
+        if (data.error) {
+            throw new Error(data.error);
+        }
+        
+        if (payload.content !== undefined) {
+            renderBlocks = new Map();
+        }
+        const blocks = new Map();
+        data.blocks.forEach(blockId => {
+            blocks.set(blockId, blockId in data.html ? data.html[blockId] : renderBlocks.get(blockId));
+        });
+        renderBlocks = blocks;
+        renderVersion = data.version;
+        renderedText = content;
+        
+        const body = data.blocks.map(blockId => renderBlocks.get(blockId)).join('\n');
+        return buildDocument(shell, body, data.global_class);
+    }
     
-            if (data.error) {
-                console.error('Render error:', data.error);
-                return;
+    // Open the server-sent event stream that pushes edit-mode previews
+    function openPreviewChannel() {
+        if (!window.EventSource || previewSource) return;
+        previewSource = new EventSource(`/api/preview/stream?tab=${encodeURIComponent(renderTab)}`);
+        
+        previewSource.addEventListener('render', event => {
+            const data = JSON.parse(event.data);
+            // Apply events in order: each one only carries blocks not sent before
+            previewQueue = previewQueue
+                .then(() => loadShell())
+                .then(shell => {
+                    const blocks = new Map();
+                    data.blocks.forEach(blockId => {
+                        blocks.set(blockId, blockId in data.html ? data.html[blockId] : renderBlocks.get(blockId));
+                    });
+                    renderBlocks = blocks;
+                    
+                    const body = data.blocks.map(blockId => renderBlocks.get(blockId)).join('\n');
+                    lastRenderedHTML = buildDocument(shell, body, data.global_class);
+                    const iframe = document.getElementById('editPreviewIframe');
+                    if (iframe) {
+                        iframe.srcdoc = lastRenderedHTML;
+                    }
+                    resolvePreviewWaiters(data.version);
+                })
+                .catch(error => {
+                    console.error('Error applying preview:', error);
+                });
+        });
+        
+        previewSource.addEventListener('render-error', event => {
+            const data = JSON.parse(event.data);
+            console.error('Error rendering Kiro:', data.error);
+            resolvePreviewWaiters(data.version);
+        });
+        
+        previewSource.onerror = () => {
+            // The browser reconnects by itself and the new stream starts with a
+            // full render; don't leave callers waiting on the dropped one
+            previewWaiters.forEach(waiter => waiter.resolve());
+            previewWaiters = [];
+            if (previewSource.readyState === EventSource.CLOSED) {
+                // Refused (503 when the server has too many streams open):
+                // render through /api/render/delta and try the stream again later
+                previewSource = null;
+                setTimeout(openPreviewChannel, PREVIEW_RETRY_MS);
             }
-
-            lastRenderedHTML = data.html;
+        };
+    }
+    
+    function resolvePreviewWaiters(version) {
+        previewRenderedVersion = Math.max(previewRenderedVersion, version);
+        previewWaiters = previewWaiters.filter(waiter => {
+            if (waiter.version > version) return true;
+            waiter.resolve();
+            return false;
+        });
+    }
     
-            // 편집모드일 때 스타일 감싼 HTML로 미리보기
-            if (!forViewMode) {
+    // Resolve once the preview for a document version has arrived
+    function waitForPreview(version) {
+        if (version <= previewRenderedVersion) return Promise.resolve();
+        return new Promise(resolve => previewWaiters.push({ version, resolve }));
+    }
+    
+    // Push edits (or the full content when out of sync) to the preview channel
+    async function pushPreviewEdit(content) {
+        const payload = { tab: renderTab };
+        if (renderedText === null) {
+            payload.content = content;
+        } else if (content === renderedText) {
+            return renderVersion;
+        } else {
+            payload.version = renderVersion;
+            payload.edits = [diffText(renderedText, content)];
+        }
+        
+        const response = await fetch('/api/preview/edit', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify(payload)
+        });
+        
+        if (response.status === 409 && payload.content === undefined) {
+            renderedText = null;
+            return pushPreviewEdit(content);
+        }
+        
+        const data = await response.json();
+        if (data.error) {
+            throw new Error(data.error);
+        }
+        renderVersion = data.version;
+        renderedText = content;
+        return data.version;
+    }
+    
+    // Stream the full document into an iframe so the top paints while the rest renders
+    async function streamRender(content, iframe) {
+        const headers = {
+            'Content-Type': 'application/json'
+        };
+        if (viewRender.etag) {
+            headers['If-None-Match'] = viewRender.etag;
+        }
+        const response = await fetch('/api/render?stream=1', {
+            method: 'POST',
+            headers: headers,
+            body: JSON.stringify({ content: content })
+        });
+        console.log('Render API response status:', response.status);
+        if (response.status === 304) {
+            // Unchanged since the last view render: the iframe already shows it
+            return viewRender.html;
+        }
+        if (!response.ok) {
+            throw new Error('Failed to render document');
+        }
+        viewRender = { etag: null, html: '' };
+        
+        const doc = iframe.contentDocument;
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let html = '';
+        doc.open();
+        while (true) {
+            const { done, value } = await reader.read();
+            const chunk = done ? decoder.decode() : decoder.decode(value, { stream: true });
+            html += chunk;
+            doc.write(chunk);
+            if (done) break;
+        }
+        doc.close();
+        viewRender = { etag: response.headers.get('ETag'), html: html };
+        return html;
+    }
+    
+    // Simple render function
+    function renderKiro(forViewMode = false) {
+        if (!editor || !editor.value) {
+            console.log('No content to render');
+            return Promise.resolve();  // Return a resolved promise for chaining
+        }
+    
+        console.log('Rendering Kiro content:', editor.value.length, 'characters');
+        
+        const content = editor.value;
+        
+        // 보기모드일 때 iframe에 전체 HTML을 스트리밍으로 삽입
+        if (forViewMode) {
+            const iframe = document.getElementById('viewIframe');
+            if (!iframe) return Promise.resolve();
+            renderQueue = renderQueue
+                .then(() => streamRender(content, iframe))
+                .then(html => {
+                    lastRenderedHTML = html;
+                    console.log('Streamed rendered HTML into view iframe');
+                })
+                .catch(error => {
+                    console.error('Error rendering Kiro:', error);
+                });
+            return renderQueue;
+        }
+        
+        // Over the preview channel only the edit POSTs are queued; the server
+        // coalesces them and pushes the render when it is ready
+        if (previewSource && previewSource.readyState !== EventSource.CLOSED) {
+            const pushed = renderQueue.then(() => pushPreviewEdit(content));
+            renderQueue = pushed.catch(error => {
+                console.error('Error sending edit:', error);
+                renderedText = null;
+            });
+            return pushed.then(version => waitForPreview(version)).catch(() => {});
+        }
+        
+        // Keep one render in flight at a time so versions stay in order
+        renderQueue = renderQueue
+            .then(() => requestDeltaRender(content))
+            .then(html => {
+                lastRenderedHTML = html;
+        
+                // 편집모드일 때 스타일 감싼 HTML로 미리보기
                 const iframe = document.getElementById('editPreviewIframe');
                 if (iframe) {
-                    iframe.srcdoc = data.html;
+                    iframe.srcdoc = html;
                     console.log('Updated edit preview iframe with full rendered HTML');
                 }
-            }            
-    
-            // 보기모드일 때 iframe에 전체 HTML 삽입
-            if (forViewMode) {
-                const iframe = document.getElementById('viewIframe');
-                if (iframe) {
-                    iframe.srcdoc = data.html;
-                    console.log('Updated iframe with full rendered HTML');
-                }
-            }
-        })
-        .catch(error => {
-            console.error('Error rendering Kiro:', error);
-        });
+            })
+            .catch(error => {
+                console.error('Error rendering Kiro:', error);
+                renderedText = null;
+            });
+        return renderQueue;
     }
 
     function downloadHtml() {
@@ -493,25 +718,40 @@ document.addEventListener('DOMContentLoaded', () => {
         
         console.log('Saving file:', currentFile);
         
+        // Send only the edit since the last save; the server checks the base version
+        const content = editor.value;
+        const payload = { path: currentFile };
+        if (lastSavedVersion) {
+            payload.base_version = lastSavedVersion;
+            payload.edits = content === lastSavedContent ? [] : [diffText(lastSavedContent, content)];
+        } else {
+            payload.content = content;
+        }
+        
         return fetch('/api/file', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({
-                path: currentFile,
-                content: editor.value
-            })
+            body: JSON.stringify(payload)
         })
         .then(response => {
+            if (response.status === 409 && payload.edits) {
+                // The file changed on the server: fall back to a full save
+                lastSavedVersion = null;
+                return saveFile();
+            }
             if (!response.ok) {
                 throw new Error('Failed to save file');
             }
-            lastSavedContent = editor.value;
-            console.log('File saved successfully');
-            // Show a brief save indicator
-            showSaveIndicator();
-            return response.json();
+            return response.json().then(data => {
+                lastSavedContent = content;
+                lastSavedVersion = data.version;
+                console.log('File saved successfully');
+                // Show a brief save indicator
+                showSaveIndicator();
+                return data;
+            });
         })
         .catch(error => {
             console.error('Error saving file:', error);
@@ -550,19 +790,43 @@ document.addEventListener('DOMContentLoaded', () => {
         }, 2000);
     }
     
-    // Load file structure
+    // Fetch one page of a folder's children from the listing API
+    async function fetchFolderPage(path, cursor = null) {
+        const params = new URLSearchParams({ path: path, depth: 1, limit: FOLDER_PAGE_SIZE });
+        if (cursor) params.set('cursor', cursor);
+        const response = await fetch(`/api/files?${params}`);
+        if (response.status === 404) return null;
+        if (!response.ok) throw new Error('Failed to load folder');
+        return response.json();
+    }
+    
+    // Check whether a file or folder already exists at path
+    async function itemExists(path) {
+        const parts = path.split('/');
+        parts.pop();
+        const parentPath = parts.join('/');
+        let cursor = null;
+        do {
+            const page = await fetchFolderPage(parentPath, cursor);
+            if (!page) return false;
+            if (page.children.some(item => item.id === path)) return true;
+            cursor = page.next_cursor;
+        } while (cursor);
+        return false;
+    }
+    
+    // Load file structure: the root folder plus every folder the user has open
     async function loadFileStructure() {
         try {
-            const response = await fetch('/api/files');
-            if (!response.ok) throw new Error('Failed to load file structure');
-            
-            const data = await response.json();
+            const data = await fetchFolderPage('');
+            if (!data) throw new Error('Failed to load file structure');
             console.log('File structure loaded:', data);
             
             const fileSystem = document.getElementById('fileSystem');
             if (fileSystem) {
                 fileSystem.innerHTML = ''; // Clear before rendering
-                renderFileTree(data, fileSystem);
+                renderFileTree(data.children, fileSystem);
+                renderLoadMore(data, fileSystem);
             }
             
             return data;
@@ -572,6 +836,53 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     }
     
+    // Add a row that fetches the next page of a folder when clicked
+    function renderLoadMore(page, container) {
+        if (!page.next_cursor) return;
+        const more = document.createElement('div');
+        more.className = 'py-1 text-gray-500';
+        more.innerHTML = '<span class="cursor-pointer hover:bg-gray-100 px-1 rounded">… 더 보기</span>';
+        more.querySelector('span').addEventListener('click', async () => {
+            try {
+                const next = await fetchFolderPage(page.id, page.next_cursor);
+                more.remove();
+                if (next) {
+                    renderFileTree(next.children, container);
+                    renderLoadMore(next, container);
+                }
+            } catch (error) {
+                console.error('Error loading folder:', error);
+                showToast('폴더 로드 실패', true);
+            }
+        });
+        container.appendChild(more);
+    }
+    
+    // Open or close a folder in the sidebar, fetching its children on open
+    async function toggleFolder(item, div, span) {
+        const open = div.querySelector(':scope > .pl-4');
+        if (open) {
+            open.remove();
+            expandedFolders.delete(item.id);
+            span.textContent = `📁 ${item.name}`;
+            return;
+        }
+        expandedFolders.add(item.id);
+        span.textContent = `📂 ${item.name}`;
+        try {
+            const page = await fetchFolderPage(item.id);
+            if (!page || !expandedFolders.has(item.id) || div.querySelector(':scope > .pl-4')) return;
+            const childContainer = document.createElement('div');
+            childContainer.className = 'pl-4';
+            div.appendChild(childContainer);
+            renderFileTree(page.children, childContainer);
+            renderLoadMore(page, childContainer);
+        } catch (error) {
+            console.error('Error loading folder:', error);
+            showToast('폴더 로드 실패', true);
+        }
+    }
+    
     // Render file tree
     function renderFileTree(items, container) {
         items.forEach(item => {
@@ -609,6 +920,11 @@ document.addEventListener('DOMContentLoaded', () => {
                     showFileContextMenu(e, item.id);
                 });
             } else if (item.type === 'folder') {
+                if (item.child_count) {
+                    span.title = `${item.child_count}개 항목`;
+                }
+                span.addEventListener('click', () => toggleFolder(item, div, span));
+                
                 // Add drop target for folders
                 span.addEventListener('dragover', (e) => {
                     // Only allow dropping files, not folders
@@ -652,16 +968,16 @@ document.addEventListener('DOMContentLoaded', () => {
             
             container.appendChild(div);
             
-            if (item.type === 'folder' && item.children && item.children.length) {
-                const childContainer = document.createElement('div');
-                childContainer.className = 'pl-4';
-                div.appendChild(childContainer);
-                renderFileTree(item.children, childContainer);
+            // Reopen folders that were open before the tree was refreshed
+            if (item.type === 'folder' && expandedFolders.has(item.id)) {
+                expandedFolders.delete(item.id);
+                toggleFolder(item, div, span);
             }
         });
         
-        // Add root-level drop target for moving files to root
-        if (container.id === 'fileSystem') {
+        // Add root-level drop target for moving files to root (once)
+        if (container.id === 'fileSystem' && !container.dataset.dropTarget) {
+            container.dataset.dropTarget = 'true';
             container.addEventListener('dragover', (e) => {
                 if (draggedItem && !draggedItem.endsWith('/') && !e.target.closest('[data-type="folder"]')) {
                     e.preventDefault();
@@ -858,69 +1174,25 @@ document.addEventListener('DOMContentLoaded', () => {
     // Rename item (file or folder)
     async function renameItem(oldPath, newPath, itemType) {
         try {
-            // First check if a file/folder with the same name already exists
-            const fileStructure = await loadFileStructure();
-            
-            // Same duplicate check function as in handleModalConfirm
-            const checkDuplicate = (items, path) => {
-                if (!items) return false;
-                
-                // Direct check for root level items
-                if (items.some(item => item.id === path)) {
-                    return true;
-                }
-                
-                // Check in folders for nested paths
-                if (path.includes('/')) {
-                    const pathParts = path.split('/');
-                    const parentFolderName = pathParts[0];
-                    const parentFolder = items.find(item => 
-                        item.type === 'folder' && item.name === parentFolderName
-                    );
-                    
-                    if (parentFolder && parentFolder.children) {
-                        const remainingPath = pathParts.slice(1).join('/');
-                        return checkDuplicate(parentFolder.children, remainingPath);
-                    }
-                }
-                
-                return false;
-            };
-            
             // Don't check if old path and new path are the same (just case change)
-            if (oldPath.toLowerCase() !== newPath.toLowerCase() && checkDuplicate(fileStructure, newPath)) {
+            if (oldPath.toLowerCase() !== newPath.toLowerCase() && await itemExists(newPath)) {
                 showToast(`이미 같은 이름의 ${itemType === 'file' ? '파일' : '폴더'}이 존재합니다`, true);
                 return;
             }
             
             if (itemType === 'file') {
-                // For files, we need to get the content, create new file, delete old
-                const response = await fetch(`/api/file?path=${encodeURIComponent(oldPath)}`);
-                if (!response.ok) throw new Error('Failed to load file');
-                
-                const data = await response.json();
-                const content = data.content;
-                
-                // Create file at new path
-                const createResponse = await fetch('/api/file', {
+                const response = await fetch('/api/file/rename', {
                     method: 'POST',
                     headers: {
                         'Content-Type': 'application/json'
                     },
                     body: JSON.stringify({
-                        path: newPath,
-                        content: content
+                        old_path: oldPath,
+                        new_path: newPath
                     })
                 });
                 
-                if (!createResponse.ok) throw new Error('Failed to create file at new location');
-                
-                // Delete old file
-                const deleteResponse = await fetch(`/api/file?path=${encodeURIComponent(oldPath)}`, {
-                    method: 'DELETE'
-                });
-                
-                if (!deleteResponse.ok) throw new Error('Failed to delete original file');
+                if (!response.ok) throw new Error('Failed to rename file');
                 
                 // Update currentFile reference if this was the open file
                 if (currentFile === oldPath) {
@@ -985,6 +1257,7 @@ document.addEventListener('DOMContentLoaded', () => {
                     editor.value = '';
                     currentFile = null;
                     lastSavedContent = '';
+                    lastSavedVersion = null;
                     document.title = '☘️Kiro';
                 }
                 
@@ -1001,6 +1274,7 @@ document.addEventListener('DOMContentLoaded', () => {
                     editor.value = '';
                     currentFile = null;
                     lastSavedContent = '';
+                    lastSavedVersion = null;
                     document.title = '☘️Kiro';
                 }
                 
@@ -1028,6 +1302,7 @@ document.addEventListener('DOMContentLoaded', () => {
                     editor.value = data.content;
                     currentFile = path;
                     lastSavedContent = data.content;
+                    lastSavedVersion = data.version;
                     document.title = `☘️Kiro - ${path.split('/').pop()}`;
                     console.log('Content set to editor, rendering preview');
                     
@@ -1052,4 +1327,5 @@ document.addEventListener('DOMContentLoaded', () => {
     
     // Initialize
     loadFileStructure();
+    openPreviewChannel();
 }); 
\ No newline at end of file